@@ -9,8 +9,13 @@ experienced programmers who are newer to Python.
 """
 
 from pathlib import Path
-import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import argparse
+import errno
+import os
+import shutil
+import time
 from datetime import datetime
 
 # --- Implementation notes ---------------------------------------------------
@@ -18,42 +23,141 @@ from datetime import datetime
 # - Two modes: by extension or by modified date (YYYY/MM folders).
 # - Use --dry-run to preview actions without changing files.
 # - Use --copy to duplicate instead of moving.
+# - Work happens in two phases so huge folders stay fast:
+#   1. build_plan() makes one os.scandir pass and records (source, target)
+#      pairs; date mode reads st_mtime from the scandir entry.
+#   2. run_plan() creates each distinct target folder once, then moves with
+#      os.replace (a plain rename that also overwrites on Windows) when
+#      source and destination share a filesystem. Copies, and moves that
+#      fail with EXDEV (cross-device), go through a thread pool fed at most
+#      workers * QUEUE_PER_WORKER jobs at a time.
+# - --dry-run prints the same plan (folders to create, then file actions).
 # ----------------------------------------------------------------------------
 
-def organize_by_extension(src: Path, dest: Path, copy: bool, dry_run: bool):
-    """Group files into subfolders named by file extension (e.g., 'pdf', 'jpg')."""
-    for p in src.iterdir():
-        if p.is_file():
-            ext = p.suffix.lower().lstrip('.') or 'no_ext'
-            target_dir = dest / ext
-            target_dir.mkdir(parents=True, exist_ok=True)
-            target_path = target_dir / p.name
-            if dry_run:
-                print(f"[DRY] {'COPY' if copy else 'MOVE'} {p} -> {target_path}")
-            else:
-                if copy:
-                    shutil.copy2(p, target_path)
+# Jobs queued per worker in the copy pool (bounds memory on huge folders).
+QUEUE_PER_WORKER = 4
+
+
+def target_by_extension(entry: os.DirEntry) -> str:
+    """Subfolder for a file by extension (e.g., 'pdf', 'jpg')."""
+    ext = os.path.splitext(entry.name)[1].lower().lstrip('.')
+    return ext or 'no_ext'
+
+
+def target_by_date(entry: os.DirEntry) -> str:
+    """Subfolder for a file by modified date: YYYY/MM."""
+    ts = datetime.fromtimestamp(entry.stat().st_mtime)
+    return os.path.join(ts.strftime('%Y'), ts.strftime('%m'))
+
+
+TARGETS = {'extension': target_by_extension, 'date': target_by_date}
+
+
+def build_plan(src: Path, dest: Path, mode: str):
+    """One scandir pass over src; return (target dirs, [(source, target), ...])."""
+    subfolder = TARGETS[mode]
+    dirs = {}  # target dir -> None; a dict keeps first-seen order
+    actions = []
+    with os.scandir(src) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            target_dir = os.path.join(dest, subfolder(entry))
+            dirs[target_dir] = None
+            actions.append((entry.path, os.path.join(target_dir, entry.name)))
+    return list(dirs), actions
+
+
+def _bounded_pool(fn, jobs, workers: int):
+    """Run fn(source, target) for each job on a thread pool; yield (job, error)."""
+    pending = deque()
+
+    def collect(job, future):
+        try:
+            future.result()
+            return job, None
+        except Exception as e:
+            return job, e
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for job in jobs:
+            pending.append((job, pool.submit(fn, *job)))
+            if len(pending) >= workers * QUEUE_PER_WORKER:
+                yield collect(*pending.popleft())
+        while pending:
+            yield collect(*pending.popleft())
+
+
+def _move_file(source: str, target: str):
+    shutil.move(source, target)
+
+
+def print_plan(dirs, actions, copy: bool):
+    verb = 'COPY' if copy else 'MOVE'
+    for d in dirs:
+        if not os.path.isdir(d):
+            print(f"[DRY] MKDIR {d}")
+    for source, target in actions:
+        print(f"[DRY] {verb} {source} -> {target}")
+
+
+def run_plan(dirs, actions, copy: bool, workers: int = 0):
+    """Execute a plan from build_plan(); return (files done, errors)."""
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
+
+    done = errors = 0
+    pooled = []  # jobs for the thread pool
+    if copy:
+        pooled, fn = actions, shutil.copy2
+    else:
+        fn = _move_file
+        for source, target in actions:
+            try:
+                os.replace(source, target)
+                done += 1
+            except OSError as e:
+                if e.errno == errno.EXDEV:  # different filesystem: copy + delete
+                    pooled.append((source, target))
                 else:
-                    shutil.move(str(p), str(target_path))
+                    print(f"[ERR] {source}: {e}")
+                    errors += 1
+
+    if pooled:
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        for (source, _), err in _bounded_pool(fn, pooled, workers):
+            if err:
+                print(f"[ERR] {source}: {err}")
+                errors += 1
+            else:
+                done += 1
+    return done, errors
 
 
-def organize_by_date(src: Path, dest: Path, copy: bool, dry_run: bool):
+def organize(src: Path, dest: Path, mode: str, copy: bool, dry_run: bool, workers: int = 0):
+    t0 = time.perf_counter()
+    dirs, actions = build_plan(src, dest, mode)
+    if dry_run:
+        print_plan(dirs, actions, copy)
+        print(f"[DRY] {len(actions)} files, {len(dirs)} folders")
+        return
+    done, errors = run_plan(dirs, actions, copy, workers)
+    elapsed = time.perf_counter() - t0
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"[OK] {'Copied' if copy else 'Moved'} {done} files into {len(dirs)} folders "
+          f"in {elapsed:.2f}s ({rate:,.0f} files/s)")
+    if errors:
+        print(f"[WARN] {errors} files failed")
+
+
+def organize_by_extension(src: Path, dest: Path, copy: bool, dry_run: bool, workers: int = 0):
+    """Group files into subfolders named by file extension (e.g., 'pdf', 'jpg')."""
+    organize(src, dest, 'extension', copy, dry_run, workers)
+
+
+def organize_by_date(src: Path, dest: Path, copy: bool, dry_run: bool, workers: int = 0):
     """Group files into subfolders by modified date: YYYY/MM."""
-    for p in src.iterdir():
-        if p.is_file():
-            ts = datetime.fromtimestamp(p.stat().st_mtime)
-            year = ts.strftime('%Y')
-            month = ts.strftime('%m')
-            target_dir = dest / year / month
-            target_dir.mkdir(parents=True, exist_ok=True)
-            target_path = target_dir / p.name
-            if dry_run:
-                print(f"[DRY] {'COPY' if copy else 'MOVE'} {p} -> {target_path}")
-            else:
-                if copy:
-                    shutil.copy2(p, target_path)
-                else:
-                    shutil.move(str(p), str(target_path))
+    organize(src, dest, 'date', copy, dry_run, workers)
 
 
 def main():
@@ -63,6 +167,8 @@ def main():
     parser.add_argument('--mode', choices=['extension', 'date'], required=True, help='Grouping mode')
     parser.add_argument('--copy', action='store_true', help='Copy instead of move')
     parser.add_argument('--dry-run', action='store_true', help='Show actions without changing anything')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Threads for copies and cross-device moves (default: CPU count + 4, max 32)')
     args = parser.parse_args()
 
     src = args.src.expanduser().resolve()
@@ -71,10 +177,9 @@ def main():
     dest.mkdir(parents=True, exist_ok=True)
 
     if args.mode == 'extension':
-        organize_by_extension(src, dest, args.copy, args.dry_run)
+        organize_by_extension(src, dest, args.copy, args.dry_run, args.workers)
     else:
-        organize_by_date(src, dest, args.copy, args.dry_run)
+        organize_by_date(src, dest, args.copy, args.dry_run, args.workers)
 
 if __name__ == '__main__':
     main()
-
@@ -12,14 +12,36 @@ from pathlib import Path
 import hashlib
 import argparse
 import csv
-from collections import defaultdict
+import os
+import sqlite3
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # --- Implementation notes ---------------------------------------------------
 # - Uses buffered hashing so very large files are supported.
+# - Staged detection keeps I/O low on large trees:
+#     1. group files by size (stat only, no reads),
+#     2. hash the first/last PARTIAL_EDGE bytes of files sharing a size,
+#     3. run the full --algo digest only on files still colliding.
+#   Files with a unique size (or unique partial hash) cannot be duplicates,
+#   so they are never read in full.
+# - --cache PATH keeps digests in SQLite keyed by (device, inode, size,
+#   mtime_ns, algo); unchanged files are never re-read on later runs.
+#   --prune-cache drops entries for files that vanished or changed.
+# - --workers N hashes on a thread pool (hashlib releases the GIL on large
+#   buffers) or a process pool (--backend process). At most
+#   N * QUEUE_PER_WORKER jobs are queued at once, so memory stays flat, and
+#   results are collected in walk order so the mapping matches a serial run.
 # - Reports duplicate groups by hash; can delete dupes (keep newest or first).
 # - Always try --dry-run before --delete.
 # ----------------------------------------------------------------------------
 
+# Bytes hashed from the head and from the tail of a file in the partial stage.
+PARTIAL_EDGE = 4096
+
+# Jobs queued per worker in parallel mode (bounds memory on huge trees).
+QUEUE_PER_WORKER = 4
+
 def file_hash(path: Path, algo: str = 'sha256', chunk_size: int = 1<<20) -> str:
     """Compute a hash for a file using buffered reads."""
     h = getattr(hashlib, algo)()
@@ -32,19 +54,219 @@ def file_hash(path: Path, algo: str = 'sha256', chunk_size: int = 1<<20) -> str:
     return h.hexdigest()
 
 
-def scan(root: Path, algo: str):
-    """Return dict: hash -> list[Path]."""
-    mapping = defaultdict(list)
-    for p in root.rglob('*'):
-        if p.is_file():
+def partial_hash(path: Path, size: int, algo: str = 'sha256', edge: int = PARTIAL_EDGE) -> str:
+    """Hash the first and last `edge` bytes of a file.
+
+    Files no larger than 2*edge are read completely, so for them the result
+    equals file_hash(path, algo) and the full stage can be skipped.
+    """
+    h = getattr(hashlib, algo)()
+    with path.open('rb') as f:
+        if size <= 2 * edge:
+            h.update(f.read())
+        else:
+            h.update(f.read(edge))
+            f.seek(-edge, 2)
+            h.update(f.read(edge))
+    return h.hexdigest()
+
+
+def partial_read_size(size: int, edge: int = PARTIAL_EDGE) -> int:
+    """Number of bytes partial_hash() reads for a file of `size` bytes."""
+    return size if size <= 2 * edge else 2 * edge
+
+
+def _group(items):
+    """Turn (key, value) pairs into {key: [values]} keeping only keys seen more than once."""
+    groups = defaultdict(list)
+    for key, value in items:
+        groups[key].append(value)
+    return {k: v for k, v in groups.items() if len(v) > 1}
+
+
+class HashCache:
+    """On-disk digest cache (SQLite) keyed by (device, inode, size, mtime_ns, algo).
+
+    Any change to a file's size or mtime gives it a new key, so stale digests
+    are never returned; prune() removes rows that can no longer match.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, algo TEXT,"
+            " digest TEXT NOT NULL, path TEXT NOT NULL,"
+            " PRIMARY KEY (dev, ino, size, mtime_ns, algo))"
+        )
+
+    @staticmethod
+    def _key(st: os.stat_result, algo: str):
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, algo)
+
+    def get(self, st: os.stat_result, algo: str):
+        row = self.conn.execute(
+            "SELECT digest FROM hashes WHERE dev=? AND ino=? AND size=? AND mtime_ns=? AND algo=?",
+            self._key(st, algo),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, st: os.stat_result, algo: str, digest: str, path: Path):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._key(st, algo) + (digest, str(path)),
+        )
+
+    def prune(self) -> int:
+        """Delete entries whose file is gone or no longer matches the stored key."""
+        stale = []
+        for dev, ino, size, mtime_ns, algo, path in self.conn.execute(
+                "SELECT dev, ino, size, mtime_ns, algo, path FROM hashes"):
             try:
-                h = file_hash(p, algo)
-                mapping[h].append(p)
+                st = os.stat(path)
+            except OSError:
+                stale.append((dev, ino, size, mtime_ns, algo))
+                continue
+            if self._key(st, algo) != (dev, ino, size, mtime_ns, algo):
+                stale.append((dev, ino, size, mtime_ns, algo))
+        self.conn.executemany(
+            "DELETE FROM hashes WHERE dev=? AND ino=? AND size=? AND mtime_ns=? AND algo=?", stale)
+        self.conn.commit()
+        return len(stale)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def _bounded_map(fn, jobs, workers: int = 1, backend: str = 'thread'):
+    """Run fn(*args) for each (key, args) in `jobs`; yield (key, result, error).
+
+    Results come back in job order. With workers > 1 a pool is fed lazily
+    from `jobs`, never holding more than workers * QUEUE_PER_WORKER jobs.
+    """
+    if workers <= 1:
+        for key, args in jobs:
+            try:
+                yield key, fn(*args), None
             except Exception as e:
-                print(f"[WARN] Cannot hash {p}: {e}")
+                yield key, None, e
+        return
+
+    def collect(key, future):
+        try:
+            return key, future.result(), None
+        except Exception as e:
+            return key, None, e
+
+    pool_cls = ProcessPoolExecutor if backend == 'process' else ThreadPoolExecutor
+    pending = deque()
+    with pool_cls(max_workers=workers) as pool:
+        for key, args in jobs:
+            pending.append((key, pool.submit(fn, *args)))
+            if len(pending) >= workers * QUEUE_PER_WORKER:
+                yield collect(*pending.popleft())
+        while pending:
+            yield collect(*pending.popleft())
+
+
+def _hash_stage(entries, fn, algo, cache_algo, cache, stats, stage, workers, backend):
+    """Hash every (path, stat) in `entries`; return {path: digest}.
+
+    Cache hits are resolved up front; only misses are sent to fn(path, size, algo).
+    """
+    digests = {}
+
+    def misses():
+        for p, st in entries:
+            hit = cache.get(st, cache_algo) if cache is not None else None
+            if hit is not None:
+                digests[p] = hit
+                stats['cache_hits'] += 1
+            else:
+                yield (p, st), (p, st.st_size, algo)
+
+    for (p, st), digest, err in _bounded_map(fn, misses(), workers, backend):
+        if err is not None:
+            print(f"[WARN] Cannot hash {p}: {err}")
+            continue
+        digests[p] = digest
+        stats[f'{stage}_files'] += 1
+        stats[f'{stage}_bytes'] += partial_read_size(st.st_size) if stage == 'partial' else st.st_size
+        if cache is not None:
+            cache.put(st, cache_algo, digest, p)
+    return digests
+
+
+def _full_job(path: Path, size: int, algo: str) -> str:
+    # Same call shape as partial_hash() so both stages share _hash_stage().
+    return file_hash(path, algo)
+
+
+def scan(root: Path, algo: str, stats: dict = None, cache: HashCache = None,
+         workers: int = 1, backend: str = 'thread'):
+    """Return dict: hash -> list[Path] for files whose size collides with another file.
+
+    Files with a unique size are skipped without being read. If `stats` is
+    given it is filled with the file count and bytes read per stage, plus the
+    bytes a naive full scan would have read. With a `cache`, digests of
+    unchanged files are reused instead of re-reading them. `workers` and
+    `backend` control parallel hashing; the result is identical either way.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(files=0, total_bytes=0, size_bytes=0, partial_bytes=0, full_bytes=0,
+                 partial_files=0, full_files=0, cache_hits=0)
+    partial_algo = f"{algo}:partial{PARTIAL_EDGE}"
+
+    # Stage 1: size (metadata only)
+    sizes = []
+    for p in root.rglob('*'):
+        try:
+            if p.is_file():
+                st = p.stat()
+                sizes.append((st.st_size, (p, st)))
+                stats['files'] += 1
+                stats['total_bytes'] += st.st_size
+        except OSError as e:
+            print(f"[WARN] Cannot stat {p}: {e}")
+    by_size = _group(sizes)
+
+    # Stage 2: head/tail hash on same-size files
+    entries = [e for group in by_size.values() for e in group]
+    partial = _hash_stage(entries, partial_hash, algo, partial_algo, cache, stats,
+                          'partial', workers, backend)
+    by_partial = _group(((st.st_size, partial[p]), (p, st)) for p, st in entries if p in partial)
+
+    # Stage 3: full digest on files still colliding. Files no larger than
+    # 2*PARTIAL_EDGE were read completely in stage 2, so reuse that digest.
+    entries = [(p, st) for group in by_partial.values() for p, st in group
+               if st.st_size > 2 * PARTIAL_EDGE]
+    full = _hash_stage(entries, _full_job, algo, algo, cache, stats, 'full', workers, backend)
+
+    mapping = defaultdict(list)
+    for group in by_partial.values():
+        for p, st in group:
+            h = partial[p] if st.st_size <= 2 * PARTIAL_EDGE else full.get(p)
+            if h is not None:
+                mapping[h].append(p)
     return mapping
 
 
+def print_io_summary(stats: dict):
+    """Print bytes read per stage compared with a naive full-hash scan."""
+    read = stats['size_bytes'] + stats['partial_bytes'] + stats['full_bytes']
+    total = stats['total_bytes']
+    saved = (1 - read / total) * 100 if total else 0.0
+    print(f"Scanned {stats['files']} files ({total} bytes).")
+    print(f"  size stage   : {stats['size_bytes']} bytes read (stat only)")
+    print(f"  partial stage: {stats['partial_bytes']} bytes read ({stats['partial_files']} files)")
+    print(f"  full stage   : {stats['full_bytes']} bytes read ({stats['full_files']} files)")
+    print(f"  cache hits   : {stats.get('cache_hits', 0)} digests reused")
+    print(f"  total read   : {read} bytes vs {total} for a full scan ({saved:.1f}% saved)")
+
+
 def write_report(mapping, out_csv: Path):
     with out_csv.open('w', newline='', encoding='utf-8') as f:
         w = csv.writer(f)
@@ -88,12 +310,25 @@ def main():
     ap.add_argument('--delete', action='store_true', help='Delete duplicates (dangerous)')
     ap.add_argument('--keep', choices=['first', 'newest'], default='newest', help='Which file to keep among duplicates')
     ap.add_argument('--dry-run', action='store_true', help='Show what would be deleted')
+    ap.add_argument('--cache', type=Path, help='SQLite hash cache to reuse digests across runs (optional)')
+    ap.add_argument('--workers', type=int, default=1, help='Parallel hashing workers (default: 1)')
+    ap.add_argument('--backend', choices=['thread', 'process'], default='thread', help='Worker pool type for --workers')
+    ap.add_argument('--prune-cache', action='store_true', help='Drop cache entries for missing or changed files')
     args = ap.parse_args()
 
     root = args.root.expanduser().resolve()
     assert root.exists(), f"Root does not exist: {root}"
 
-    mapping = scan(root, args.algo)
+    cache = HashCache(args.cache.expanduser().resolve()) if args.cache else None
+    try:
+        if cache and args.prune_cache:
+            print(f"Pruned {cache.prune()} stale cache entries.")
+        stats = {}
+        mapping = scan(root, args.algo, stats, cache, args.workers, args.backend)
+    finally:
+        if cache:
+            cache.close()
+    print_io_summary(stats)
     dupes = {h: p for h, p in mapping.items() if len(p) > 1}
     print(f"Found {len(dupes)} duplicate groups.")
 
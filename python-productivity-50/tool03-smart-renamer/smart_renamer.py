@@ -10,30 +10,181 @@ experienced programmers who are newer to Python.
 
 from pathlib import Path
 import argparse
+import json
+import os
+import sys
+import time
 
 # --- Implementation notes ---------------------------------------------------
 # - Applies prefix/suffix and optional sequence numbers.
 # - Preview changes with --dry-run before applying.
 # - Filter by extension with --ext .jpg (for example).
+# - Renames are planned before anything is touched:
+#   1. plan_renames() builds the whole old -> new mapping from one scandir.
+#   2. find_collisions() rejects the plan if two files would get the same
+#      name or a new name is taken by a file that is not being renamed.
+#   3. order_renames() turns the mapping into safe steps: a file moves only
+#      once its new name is free, so chains run end-first, and a cycle
+#      (a -> b -> a) is broken by parking one file under a temporary name.
+# - Write-ahead journal: before the first rename, the original name and
+#   inode of every file in the batch are written to JOURNAL_NAME and
+#   fsync'd; the journal is removed after the last rename. Journalling
+#   inodes rather than steps means an interrupted run needs no progress
+#   records: --rollback finds each journalled inode wherever it is now and
+#   plans the renames back to the original names with the same engine.
 # ----------------------------------------------------------------------------
 
-def smart_rename(dir_path: Path, prefix: str, suffix: str, ext_filter: str, seq: bool, start: int, dry: bool):
-    files = [p for p in dir_path.iterdir() if p.is_file() and (not ext_filter or p.suffix.lower() == ext_filter.lower())]
-    files.sort()
+# Journal kept in the renamed directory while a batch is in progress.
+JOURNAL_NAME = '.smart_renamer.journal'
+
+
+def plan_renames(dir_path: Path, prefix: str, suffix: str, ext_filter: str, seq: bool, start: int):
+    """Return ({old name: new name}, set of all names in dir_path, {old name: inode})."""
+    names = set()
+    inodes = {}
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            names.add(entry.name)
+            if entry.is_file() and (not ext_filter or os.path.splitext(entry.name)[1].lower() == ext_filter.lower()):
+                inodes[entry.name] = entry.inode()
+    files = sorted(inodes)
+
+    mapping = {}
     counter = start
-    for p in files:
-        stem = p.stem
+    for name in files:
+        stem, ext = os.path.splitext(name)
         new_stem = f"{prefix or ''}{stem}{suffix or ''}"
         if seq:
             new_stem = f"{new_stem}_{counter:03d}"
             counter += 1
-        new_name = new_stem + p.suffix
-        target = p.with_name(new_name)
-        if dry:
-            print(f"[PREVIEW] {p.name} -> {target.name}")
-        else:
-            p.rename(target)
-            print(f"[OK] {p.name} -> {target.name}")
+        if new_stem + ext != name:
+            mapping[name] = new_stem + ext
+    return mapping, names, {name: inodes[name] for name in mapping}
+
+
+def find_collisions(mapping: dict, names: set):
+    """List (new name, reason) for targets that would overwrite something."""
+    problems = []
+    claimed = {}
+    for old, new in mapping.items():
+        if new in claimed:
+            problems.append((new, f"both {claimed[new]} and {old} would get this name"))
+        claimed[new] = old
+        if new in names and new not in mapping:
+            problems.append((new, f"{old} would overwrite an existing entry"))
+    return problems
+
+
+def _temp_name(name: str, taken) -> str:
+    n = 0
+    while True:
+        tmp = f".{name}.renaming{n or ''}"
+        if tmp not in taken:
+            return tmp
+        n += 1
+
+
+def order_renames(mapping: dict, names: set):
+    """Turn a collision-free mapping into (src, dst) steps; return (steps, cycles)."""
+    rev = {new: old for old, new in mapping.items()}
+    steps = []
+    done = set()
+
+    # Chains: start at each file whose target is free and walk back.
+    for old, new in mapping.items():
+        if new in mapping:
+            continue
+        cur = old
+        while cur is not None and cur not in done:
+            steps.append((cur, mapping[cur]))
+            done.add(cur)
+            cur = rev.get(cur)
+
+    # What remains are cycles: park one member, shift the rest, un-park.
+    cycles = 0
+    for old in mapping:
+        if old in done:
+            continue
+        cycles += 1
+        tmp = _temp_name(old, names)
+        names.add(tmp)
+        steps.append((old, tmp))
+        done.add(old)
+        cur = rev[old]
+        while cur != old:
+            steps.append((cur, mapping[cur]))
+            done.add(cur)
+            cur = rev[cur]
+        steps.append((tmp, mapping[old]))
+    return steps, cycles
+
+
+def write_journal(journal: Path, inodes: dict):
+    """Persist original names and inodes before any rename happens."""
+    with journal.open('w', encoding='utf-8') as f:
+        f.write(''.join(json.dumps([name, ino]) + '\n' for name, ino in inodes.items()))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def apply_steps(dir_path: Path, steps, inodes: dict, verbose: bool = False):
+    journal = dir_path / JOURNAL_NAME
+    write_journal(journal, inodes)
+    for src, dst in steps:
+        os.rename(dir_path / src, dir_path / dst)
+        if verbose:
+            print(f"[OK] {src} -> {dst}")
+    journal.unlink()
+
+
+def rollback(dir_path: Path) -> int:
+    """Return every journalled file to its original name; return how many moved."""
+    journal = dir_path / JOURNAL_NAME
+    with journal.open(encoding='utf-8') as f:
+        original = {ino: name for name, ino in (json.loads(line) for line in f if line.strip())}
+    names = set()
+    mapping = {}
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            names.add(entry.name)
+            want = original.get(entry.inode()) if entry.is_file() else None
+            if want is not None and want != entry.name:
+                mapping[entry.name] = want
+    problems = find_collisions(mapping, names)
+    if problems:
+        for name, reason in problems:
+            print(f"[ERR] {name}: {reason}")
+        raise RuntimeError(f"cannot roll back; journal kept at {journal}")
+    steps, _ = order_renames(mapping, names)
+    for src, dst in steps:
+        os.rename(dir_path / src, dir_path / dst)
+    journal.unlink()
+    return len(mapping)
+
+
+def smart_rename(dir_path: Path, prefix: str, suffix: str, ext_filter: str, seq: bool, start: int, dry: bool,
+                 verbose: bool = False):
+    t0 = time.perf_counter()
+    mapping, names, inodes = plan_renames(dir_path, prefix, suffix, ext_filter, seq, start)
+    problems = find_collisions(mapping, names)
+    if problems:
+        for name, reason in problems:
+            print(f"[ERR] {name}: {reason}")
+        print(f"[ERR] {len(problems)} collisions; nothing renamed")
+        return False
+
+    steps, cycles = order_renames(mapping, names)
+    if dry:
+        for old, new in mapping.items():
+            print(f"[PREVIEW] {old} -> {new}")
+        if cycles:
+            print(f"[PREVIEW] {cycles} rename cycles will go through temporary names")
+        return True
+
+    apply_steps(dir_path, steps, inodes, verbose)
+    print(f"[OK] Renamed {len(mapping)} files in {time.perf_counter() - t0:.2f}s"
+          + (f" ({cycles} cycles via temporary names)" if cycles else ""))
+    return True
 
 
 def main():
@@ -45,13 +196,30 @@ def main():
     ap.add_argument('--seq', action='store_true', help='Append sequence numbers')
     ap.add_argument('--start', type=int, default=1, help='Sequence start value')
     ap.add_argument('--dry-run', action='store_true', help='Preview without renaming')
+    ap.add_argument('--verbose', action='store_true', help='Print every rename as it happens')
+    ap.add_argument('--rollback', action='store_true', help='Undo an interrupted batch using its journal')
     args = ap.parse_args()
 
     d = args.dir.expanduser().resolve()
     assert d.exists() and d.is_dir(), f"Directory not found: {d}"
 
-    smart_rename(d, args.prefix, args.suffix, args.ext, args.seq, args.start, args.dry_run)
+    journal = d / JOURNAL_NAME
+    if args.rollback:
+        if not journal.exists():
+            print(f"[WARN] No journal in {d}; nothing to roll back")
+            return
+        try:
+            print(f"[OK] Rolled back {rollback(d)} renames")
+        except RuntimeError as e:
+            print(f"[ERR] {e}")
+            sys.exit(1)
+        return
+    if journal.exists():
+        print(f"[ERR] A previous batch in {d} did not finish; run again with --rollback first")
+        sys.exit(1)
+
+    if not smart_rename(d, args.prefix, args.suffix, args.ext, args.seq, args.start, args.dry_run, args.verbose):
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
-
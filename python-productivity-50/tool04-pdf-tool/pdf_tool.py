@@ -9,24 +9,258 @@ experienced programmers who are newer to Python.
 """
 
 import argparse
+import hashlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject, \
+    NumberObject, StreamObject
+
+try:
+    import resource  # Unix only; used for the peak memory report
+except ImportError:
+    resource = None
 
 # --- Implementation notes ---------------------------------------------------
 # - Merge: concatenates pages from inputs in order.
+# - merge --stream keeps memory bounded for thousands of inputs: only one
+#   input is open at a time and every object is written to the output as
+#   soon as it is copied (StreamingMerger), so the process holds the xref
+#   offsets and page list, not the pages. Document-level extras such as
+#   outlines and form fields are not carried over (the default merge drops
+#   them too).
+# - merge --dedupe-resources (implies --stream): stream objects (fonts,
+#   images, form XObjects) are copied children-first, so a stream's bytes
+#   already carry the output numbers of what it references; the SHA-256 of
+#   those bytes is looked up across all inputs and a repeat reuses the
+#   object written first. Only streams are shared, never page-level
+#   dictionaries, and an object on a reference cycle keeps its own copy.
+# - Merge reports wall time and peak RSS.
 # - Split: parses 1-based ranges like "1-3,5,7-" into page indices.
 # - Writes a single split PDF for selected pages for simplicity.
+# - Several outputs in one run: groups separated by ';' ("1-10;11-20;21-")
+#   or --every N. Outputs are written on a process pool (page copying and
+#   serialization are pure Python, so threads would just take turns on the
+#   GIL). Each worker keeps its own parsed reader, inherited from the parent
+#   where processes are forked, otherwise parsed once on first use; a
+#   PdfReader is not safe to share, as reading pages seeks its stream.
 # ----------------------------------------------------------------------------
 
-def do_merge(output: Path, inputs):
-    writer = PdfWriter()
-    for f in inputs:
-        r = PdfReader(str(f))
-        for page in r.pages:
-            writer.add_page(page)
-    with output.open('wb') as fo:
-        writer.write(fo)
-    print(f"[OK] Wrote merged PDF: {output}")
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB (0.0 where unsupported)."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024  # bytes vs KB
+
+
+class StreamingMerger:
+    """Write pages of many PDFs to one output without keeping them in memory.
+
+    Objects reachable from each page are renumbered and written immediately;
+    the page tree and xref table are written by close().
+    """
+
+    CATALOG, PAGES = 1, 2  # reserved object numbers
+
+    def __init__(self, fo, dedupe: bool = False):
+        self.fo = fo
+        self.offsets = [None, None, None]  # index = object number
+        self.kids = []
+        self.dedupe = dedupe
+        self.streams = {}  # sha256 of a written stream -> its object number
+        self.shared = 0
+        self.saved_bytes = 0
+        fo.write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+
+    def _new_number(self) -> int:
+        self.offsets.append(None)
+        return len(self.offsets) - 1
+
+    def _write(self, num: int, obj):
+        self.offsets[num] = self.fo.tell()
+        self.fo.write(f"{num} 0 obj\n".encode('ascii'))
+        obj.write_to_stream(self.fo, None)
+        self.fo.write(b"\nendobj\n")
+
+    def _write_shared(self, obj, num=None) -> int:
+        """Write a copied stream unless an identical one exists; return its number."""
+        buf = io.BytesIO()
+        obj.write_to_stream(buf, None)
+        data = buf.getvalue()
+        digest = hashlib.sha256(data).digest()
+        if num is None:  # not on a reference cycle, free to share
+            if digest in self.streams:
+                self.shared += 1
+                self.saved_bytes += len(data)
+                return self.streams[digest]
+            num = self._new_number()
+            self.streams[digest] = num
+        self.offsets[num] = self.fo.tell()
+        self.fo.write(f"{num} 0 obj\n".encode('ascii'))
+        self.fo.write(data)
+        self.fo.write(b"\nendobj\n")
+        return num
+
+    def add_pdf(self, path: Path) -> int:
+        """Append all pages of `path`; return the number of pages added."""
+        reader = PdfReader(str(path))
+        mapping = {}  # (idnum, generation) in this input -> output object number
+        todo = []     # (output number, source reference) still to be written
+        pending = {}  # dedupe: key -> number fixed early because of a cycle, else None
+
+        def ref(ind: IndirectObject) -> IndirectObject:
+            key = (ind.idnum, ind.generation)
+            if self.dedupe and key not in mapping:
+                if key in pending:  # reference cycle: this object cannot be shared
+                    if pending[key] is None:
+                        pending[key] = self._new_number()
+                    return IndirectObject(pending[key], 0, None)
+                return IndirectObject(shared_ref(ind, key), 0, None)
+            if key not in mapping:
+                mapping[key] = self._new_number()
+                todo.append((mapping[key], ind))
+            return IndirectObject(mapping[key], 0, None)
+
+        def copy(obj):
+            if isinstance(obj, IndirectObject):
+                return ref(obj)
+            if isinstance(obj, StreamObject):
+                new = obj.__class__()
+                new._data = obj._data  # raw bytes, still encoded with its /Filter
+                for k, v in obj.items():
+                    if k != '/Length':  # rewritten from the data on output
+                        new[k] = copy(v)
+                return new
+            if isinstance(obj, DictionaryObject):
+                new = DictionaryObject()
+                for k, v in obj.items():
+                    new[k] = copy(v)
+                return new
+            if isinstance(obj, ArrayObject):
+                return ArrayObject(copy(v) for v in obj)
+            return obj
+
+        def load(ind: IndirectObject):
+            obj = ind.get_object()
+            if isinstance(obj, DictionaryObject) and obj.get('/Type') == '/Pages':
+                obj = NullObject()  # the input's page tree is not copied
+            return obj
+
+        def refs_in(obj):
+            """Indirect references directly inside obj (not through other objects)."""
+            stack = [obj]
+            while stack:
+                o = stack.pop()
+                if isinstance(o, IndirectObject):
+                    yield o
+                elif isinstance(o, DictionaryObject):
+                    skip_length = isinstance(o, StreamObject)
+                    stack.extend(v for k, v in o.items() if not (skip_length and k == '/Length'))
+                elif isinstance(o, ArrayObject):
+                    stack.extend(o)
+
+        def shared_ref(ind: IndirectObject, key) -> int:
+            # Children are copied (and written) before the object itself. The
+            # walk keeps its own stack so long /Next or /Prev chains do not
+            # run into Python's recursion limit.
+            pending[key] = None
+            obj = load(ind)
+            stack = [(key, obj, refs_in(obj))]
+            while stack:
+                key, obj, children = stack[-1]
+                for child in children:
+                    ckey = (child.idnum, child.generation)
+                    if ckey not in mapping and ckey not in pending:
+                        pending[ckey] = None
+                        cobj = load(child)
+                        stack.append((ckey, cobj, refs_in(cobj)))
+                        break
+                else:
+                    stack.pop()
+                    obj = copy(obj)  # every child is now in mapping or pending
+                    num = pending.pop(key)
+                    if isinstance(obj, StreamObject):
+                        num = self._write_shared(obj, num)
+                    else:
+                        num = num or self._new_number()
+                        self._write(num, obj)
+                    mapping[key] = num
+            return num
+
+        # Number the pages first so links between pages resolve to the copies.
+        pages = reader.pages
+        numbers = []
+        for page in pages:
+            num = self._new_number()
+            if page.indirect_reference is not None:
+                ir = page.indirect_reference
+                mapping[(ir.idnum, ir.generation)] = num
+            numbers.append(num)
+
+        for page, num in zip(pages, numbers):
+            # Inherited attributes are already flattened into the page.
+            d = DictionaryObject({k: copy(v) for k, v in page.items() if k != '/Parent'})
+            d[NameObject('/Parent')] = IndirectObject(self.PAGES, 0, None)
+            self._write(num, d)
+            self.kids.append(IndirectObject(num, 0, None))
+            while todo:
+                obj_num, ind = todo.pop()
+                self._write(obj_num, copy(load(ind)))
+        return len(numbers)
+
+    def close(self):
+        """Write the page tree, catalog, xref table and trailer."""
+        self._write(self.PAGES, DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(self.kids),
+            NameObject('/Count'): NumberObject(len(self.kids)),
+        }))
+        self._write(self.CATALOG, DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): IndirectObject(self.PAGES, 0, None),
+        }))
+        xref = self.fo.tell()
+        self.fo.write(f"xref\n0 {len(self.offsets)}\n0000000000 65535 f \n".encode('ascii'))
+        for off in self.offsets[1:]:
+            self.fo.write(f"{off:010d} 00000 n \n".encode('ascii'))
+        trailer = DictionaryObject({
+            NameObject('/Size'): NumberObject(len(self.offsets)),
+            NameObject('/Root'): IndirectObject(self.CATALOG, 0, None),
+        })
+        self.fo.write(b"trailer\n")
+        trailer.write_to_stream(self.fo, None)
+        self.fo.write(f"\nstartxref\n{xref}\n%%EOF\n".encode('ascii'))
+
+
+def do_merge(output: Path, inputs, stream: bool = False, dedupe: bool = False):
+    t0 = time.perf_counter()
+    if stream or dedupe:
+        pages = 0
+        with output.open('wb') as fo:
+            merger = StreamingMerger(fo, dedupe)
+            for f in inputs:
+                pages += merger.add_pdf(f)
+            merger.close()
+        if dedupe:
+            print(f"[OK] Shared {merger.shared} repeated streams "
+                  f"({merger.saved_bytes / (1 << 20):.1f} MB not written)")
+    else:
+        writer = PdfWriter()
+        for f in inputs:
+            r = PdfReader(str(f))
+            for page in r.pages:
+                writer.add_page(page)
+        pages = len(writer.pages)
+        with output.open('wb') as fo:
+            writer.write(fo)
+    print(f"[OK] Wrote merged PDF: {output} ({pages} pages)")
+    print(f"     {time.perf_counter() - t0:.2f}s, peak RSS {peak_rss_mb():.1f} MB")
 
 
 def parse_ranges(ranges: str, total_pages: int):
@@ -57,19 +291,73 @@ def parse_ranges(ranges: str, total_pages: int):
     return out
 
 
-def do_split(src: Path, ranges: str, outdir: Path):
-    reader = PdfReader(str(src))
-    total = len(reader.pages)
-    idxs = parse_ranges(ranges, total)
-    outdir.mkdir(parents=True, exist_ok=True)
+def split_groups(ranges: str, total_pages: int):
+    """Split 'a;b;c' into one parse_ranges() result per group."""
+    return [parse_ranges(group, total_pages) for group in ranges.split(';') if group.strip()]
+
+
+def every_groups(n: int, total_pages: int):
+    """Consecutive chunks of n pages: [0..n-1], [n..2n-1], ..."""
+    return [list(range(i, min(i + n, total_pages))) for i in range(0, total_pages, n)]
 
+
+@lru_cache(maxsize=1)
+def _worker_reader(src: str) -> PdfReader:
+    # Parsed once per process (forked workers inherit the parent's copy).
+    return PdfReader(src)
+
+
+def write_pages(src: str, idxs, out_path: str) -> str:
+    reader = _worker_reader(src)
     w = PdfWriter()
     for i in idxs:
         w.add_page(reader.pages[i])
-    out_path = outdir / f"{src.stem}_split.pdf"
-    with out_path.open('wb') as fo:
+    with open(out_path, 'wb') as fo:
         w.write(fo)
-    print(f"[OK] Wrote split PDF: {out_path} (pages: {len(idxs)})")
+    return out_path
+
+
+def do_split(src: Path, ranges: str, outdir: Path, every: int = 0, workers: int = 0):
+    t0 = time.perf_counter()
+    _worker_reader.cache_clear()  # the file may have changed since an earlier call
+    total = len(_worker_reader(str(src)).pages)
+    groups = every_groups(every, total) if every else split_groups(ranges, total)
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    if len(groups) == 1 and not every:
+        names = [f"{src.stem}_split.pdf"]  # single group keeps the original name
+    else:
+        width = len(str(len(groups)))
+        names = [f"{src.stem}_part{n:0{width}d}.pdf" for n in range(1, len(groups) + 1)]
+    jobs = []
+    for name, idxs in zip(names, groups):
+        if idxs:
+            jobs.append((idxs, outdir / name))
+        else:
+            print(f"[WARN] No pages selected for {name}; skipped")
+    if not jobs:
+        return
+
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+
+    def report(idxs, run):
+        try:
+            out_path = run()
+        except Exception as e:
+            print(f"[ERR] {e}")
+            return
+        print(f"[OK] Wrote split PDF: {out_path} (pages: {len(idxs)})")
+
+    if workers <= 1 or len(jobs) == 1:
+        for idxs, out_path in jobs:
+            report(idxs, lambda: write_pages(str(src), idxs, str(out_path)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(write_pages, str(src), idxs, str(out_path)) for idxs, out_path in jobs]
+            for (idxs, _), fut in zip(jobs, futures):
+                report(idxs, fut.result)
+    if len(jobs) > 1:
+        print(f"     {len(jobs)} files in {time.perf_counter() - t0:.2f}s")
 
 
 def main():
@@ -78,19 +366,31 @@ def main():
 
     m = sub.add_parser('merge', help='Merge PDFs into one')
     m.add_argument('--out', required=True, type=Path, help='Output PDF')
+    m.add_argument('--stream', action='store_true',
+                   help='Bounded-memory merge: write pages out as they are read (for very many inputs)')
+    m.add_argument('--dedupe-resources', action='store_true',
+                   help='Write identical fonts/images/streams once across inputs (implies --stream)')
     m.add_argument('inputs', nargs='+', type=Path, help='Input PDFs in order')
 
     s = sub.add_parser('split', help='Split a PDF by page ranges')
     s.add_argument('--src', required=True, type=Path, help='Source PDF')
-    s.add_argument('--ranges', required=True, type=str, help='Ranges like "1-3,5,7-" (1-based)')
+    g = s.add_mutually_exclusive_group(required=True)
+    g.add_argument('--ranges', type=str,
+                   help='Ranges like "1-3,5,7-" (1-based); separate groups with ";" for several files')
+    g.add_argument('--every', type=int, help='One output file per N pages')
     s.add_argument('--outdir', required=True, type=Path, help='Output directory')
+    s.add_argument('--workers', type=int, default=0, help='Writer processes (default: CPU count)')
 
     args = ap.parse_args()
 
     if args.cmd == 'merge':
-        do_merge(args.out.expanduser().resolve(), [p.expanduser().resolve() for p in args.inputs])
+        do_merge(args.out.expanduser().resolve(), [p.expanduser().resolve() for p in args.inputs],
+                 args.stream, args.dedupe_resources)
     else:
-        do_split(args.src.expanduser().resolve(), args.ranges, args.outdir.expanduser().resolve())
+        if args.every is not None and args.every < 1:
+            ap.error('--every must be at least 1')
+        do_split(args.src.expanduser().resolve(), args.ranges, args.outdir.expanduser().resolve(),
+                 args.every or 0, args.workers)
 
 if __name__ == '__main__':
     main()
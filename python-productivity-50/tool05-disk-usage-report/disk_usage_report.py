@@ -11,12 +11,45 @@ experienced programmers who are newer to Python.
 from pathlib import Path
 import argparse
 import csv
+import heapq
+import json
+import os
+import sys
+import threading
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # --- Implementation notes ---------------------------------------------------
-# - Computes total size per top-level child and lists top N largest files.
+# - One os.scandir walk computes directory totals at every depth and the
+#   top N largest files together; DirEntry caches type info, so each file is
+#   stat'ed once.
+# - The top N list is a bounded min-heap: memory is O(N), not O(files).
+# - --workers N lists directories on a thread pool (helps on NFS, where each
+#   readdir/stat is a network round trip). Every subdirectory becomes its own
+#   task on the pool's shared queue, so idle workers pick up whatever is left
+#   anywhere in the tree. --max-open caps simultaneously open directory
+#   handles. Results are merged at the end and are identical to a serial walk.
+# - --snapshot FILE saves a compact columnar table (one array per column,
+#   zlib-compressed) of every directory: mtime, own bytes, total bytes,
+#   parent and its top N files. The next run reuses the cached listing of any
+#   directory whose mtime is unchanged instead of reading and stat'ing it.
+#   A directory's mtime only changes when entries are added, removed or
+#   renamed, so in-place growth of an existing file in an unchanged directory
+#   is not seen; run without --snapshot now and then for a full rescan.
+#   A directory that cannot be stat'ed is stored with mtime NO_MTIME (-1),
+#   which never matches on the next run, so it is simply listed again.
+# - --diff FILE prints the directories whose totals grew the most since an
+#   earlier snapshot. It compares directory totals only: a snapshot keeps
+#   just the top N files per directory, which cannot tell a file that grew
+#   from one that merely entered the top N, and misses growth elsewhere.
+# - Computes total size per top-level child (or deeper with --depth).
 # - Optional CSV and Markdown outputs.
 # ----------------------------------------------------------------------------
 
+SNAPSHOT_MAGIC = b'DUSNAP1\n'
+NO_MTIME = -1  # stored for directories that could not be stat'ed; never reused
+
 def human_bytes(n: int) -> str:
     for unit in ['B','KB','MB','GB','TB']:
         if n < 1024:
@@ -25,33 +58,219 @@ def human_bytes(n: int) -> str:
     return f"{n:.1f} PB"
 
 
-def dir_size(p: Path) -> int:
+def _push_top(heap, top_n: int, size: int, path: str):
+    """Keep `heap` as a min-heap of the `top_n` largest (size, path) pairs."""
+    if len(heap) < top_n:
+        heapq.heappush(heap, (size, path))
+    elif top_n and (size, path) > heap[0]:
+        heapq.heapreplace(heap, (size, path))
+
+
+def _scan_dir(d: str, top_n: int, handles: threading.Semaphore = None, prev: dict = None):
+    """List one directory; return (bytes of its files, [subdirs], top-N heap, mtime_ns).
+
+    With `prev` (directory records from a snapshot) the directory's mtime is
+    checked first and, if unchanged, its cached listing is returned unread.
+    mtime_ns is NO_MTIME when the directory was not (or could not be) stat'ed.
+    """
     total = 0
-    for f in p.rglob('*'):
-        try:
-            if f.is_file():
-                total += f.stat().st_size
-        except Exception:
-            pass
-    return total
+    subdirs = []
+    heap = []
+    mtime_ns = NO_MTIME
+    if handles is not None:
+        handles.acquire()
+    try:
+        if prev is not None:
+            mtime_ns = os.stat(d).st_mtime_ns
+            cached = prev.get(d)
+            if cached is not None and cached[0] == mtime_ns:
+                _, own, cached_subdirs, cached_top = cached
+                return own, list(cached_subdirs), heapq.nlargest(top_n, cached_top), mtime_ns
+        with os.scandir(d) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        size = entry.stat().st_size
+                        total += size
+                        _push_top(heap, top_n, size, entry.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    finally:
+        if handles is not None:
+            handles.release()
+    return total, subdirs, heap, mtime_ns
+
+
+def scan_tree(root: Path, top_n: int = 10, workers: int = 1, max_open: int = None,
+              prev: dict = None, records: dict = None):
+    """Walk `root` once; return (dir_sizes, largest).
+
+    dir_sizes: {directory path (str): total bytes of files below it}, for
+               `root` and every directory under it.
+    largest  : list[(size, Path)] of the `top_n` largest files, biggest first.
+    Symlinked directories are not followed (same as Path.rglob).
+    With workers > 1 directories are listed in parallel; the result is the same.
+    `prev` ({dir: (mtime_ns, own, subdirs, top)} from load_snapshot) enables
+    reuse of unchanged directories; `records`, if given, is filled in that
+    same shape for save_snapshot.
+    """
+    own = {}      # dir -> bytes of files directly inside it (parents first)
+    parent = {}   # dir -> parent dir
+    heap = []     # min-heap of (size, path) holding the current top N
+
+    def record(d, result):
+        total, subdirs, local, mtime_ns = result
+        own[d] = total
+        if records is not None:
+            records[d] = (mtime_ns, total, subdirs, local)
+        for sd in subdirs:
+            parent[sd] = d
+        for size, path in local:
+            _push_top(heap, top_n, size, path)
+        return subdirs
+
+    if workers <= 1:
+        stack = [str(root)]
+        while stack:
+            d = stack.pop()
+            stack.extend(record(d, _scan_dir(d, top_n, None, prev)))
+    else:
+        handles = threading.Semaphore(max_open) if max_open else None
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(_scan_dir, str(root), top_n, handles, prev): str(root)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    d = pending.pop(fut)
+                    for sd in record(d, fut.result()):
+                        pending[pool.submit(_scan_dir, sd, top_n, handles, prev)] = sd
+
+    # A directory is always recorded after its parent, so rolling sizes up in
+    # reverse order finishes every subtree before its parent needs it.
+    dir_sizes = dict(own)
+    for d in reversed(list(own)):
+        if d in parent:
+            dir_sizes[parent[d]] += dir_sizes[d]
+
+    largest = [(size, Path(path)) for size, path in sorted(heap, reverse=True)]
+    return dir_sizes, largest
+
+
+def save_snapshot(path: Path, root: Path, top_n: int, records: dict, dir_sizes: dict):
+    """Write scan records as a zlib-compressed set of columns.
+
+    Layout: magic, then length-prefixed blocks: JSON header, directory paths
+    (NUL-separated), int64 arrays mtime_ns / own / total / parent index, then
+    the per-directory top files as dir index / size arrays and names.
+    """
+    dirs = list(records)
+    index = {d: i for i, d in enumerate(dirs)}
+    mtimes, own, totals, parents = array('q'), array('q'), array('q'), array('q')
+    file_dir, file_size, file_names = array('q'), array('q'), []
+    for i, d in enumerate(dirs):
+        mtime_ns, total, subdirs, top = records[d]
+        mtimes.append(mtime_ns)
+        own.append(total)
+        totals.append(dir_sizes[d])
+        parents.append(-1)
+        for size, fpath in top:
+            file_dir.append(i)
+            file_size.append(size)
+            file_names.append(os.path.basename(fpath))
+    for i, d in enumerate(dirs):
+        for sd in records[d][2]:
+            if sd in index:
+                parents[index[sd]] = i
+
+    header = {'root': str(root), 'top_n': top_n, 'byteorder': sys.byteorder}
+    blocks = [
+        json.dumps(header).encode('utf-8'),
+        '\0'.join(dirs).encode('utf-8', 'surrogateescape'),
+        mtimes.tobytes(), own.tobytes(), totals.tobytes(), parents.tobytes(),
+        file_dir.tobytes(), file_size.tobytes(),
+        '\0'.join(file_names).encode('utf-8', 'surrogateescape'),
+    ]
+    body = b''.join(len(b).to_bytes(8, 'little') + b for b in blocks)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(SNAPSHOT_MAGIC + zlib.compress(body))
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: Path):
+    """Read a snapshot; return (header, {dir: (mtime_ns, own, subdirs, top)}, {dir: total})."""
+    raw = path.read_bytes()
+    if not raw.startswith(SNAPSHOT_MAGIC):
+        raise ValueError(f"Not a disk usage snapshot: {path}")
+    body = zlib.decompress(raw[len(SNAPSHOT_MAGIC):])
+    blocks, pos = [], 0
+    while pos < len(body):
+        n = int.from_bytes(body[pos:pos + 8], 'little')
+        blocks.append(body[pos + 8:pos + 8 + n])
+        pos += 8 + n
+
+    header = json.loads(blocks[0])
+    dirs = blocks[1].decode('utf-8', 'surrogateescape').split('\0') if blocks[1] else []
+    cols = []
+    for b in blocks[2:8]:
+        a = array('q')
+        a.frombytes(b)
+        if header['byteorder'] != sys.byteorder:
+            a.byteswap()
+        cols.append(a)
+    mtimes, own, totals, parents, file_dir, file_size = cols
+    names = blocks[8].decode('utf-8', 'surrogateescape').split('\0') if blocks[8] else []
+
+    subdirs = [[] for _ in dirs]
+    for i, p in enumerate(parents):
+        if p >= 0:
+            subdirs[p].append(dirs[i])
+    tops = [[] for _ in dirs]
+    for i, size, name in zip(file_dir, file_size, names):
+        tops[i].append((size, os.path.join(dirs[i], name)))
+    prev = {d: (mtimes[i], own[i], subdirs[i], tops[i]) for i, d in enumerate(dirs)}
+    dir_totals = {d: totals[i] for i, d in enumerate(dirs)}
+    return header, prev, dir_totals
+
+
+def diff_snapshots(old_totals: dict, new_totals: dict, n: int):
+    """Return the `n` directories whose total grew the most, as [(delta, path)]."""
+    grown = [(size - old_totals.get(d, 0), d) for d, size in new_totals.items()]
+    return sorted((x for x in grown if x[0] > 0), reverse=True)[:n]
+
+
+def dir_size(p: Path) -> int:
+    dir_sizes, _ = scan_tree(p, 0)
+    return dir_sizes[str(p)]
 
 
 def top_n_files(root: Path, n: int):
-    files = []
-    for f in root.rglob('*'):
-        try:
-            if f.is_file():
-                files.append((f.stat().st_size, f))
-        except Exception:
-            pass
-    files.sort(reverse=True, key=lambda x: x[0])
-    return files[:n]
+    _, largest = scan_tree(root, n)
+    return largest
+
+
+def sizes_at_depth(root: Path, dir_sizes: dict, depth: int):
+    """Return [(relative name, size)] for directories 1..depth levels below root."""
+    out = []
+    for d, size in dir_sizes.items():
+        rel = Path(d).relative_to(root)
+        if 1 <= len(rel.parts) <= depth:
+            out.append((rel.as_posix(), size))
+    return sorted(out)
 
 
 def main():
     ap = argparse.ArgumentParser(description='Create a disk usage summary and largest files list.')
     ap.add_argument('--root', type=Path, required=True, help='Root directory to analyze')
     ap.add_argument('--top', type=int, default=10, help='Top N largest files to list')
+    ap.add_argument('--depth', type=int, default=1, help='Report directory sizes down to this depth (default: 1)')
+    ap.add_argument('--workers', type=int, default=1, help='Threads listing directories in parallel (default: 1)')
+    ap.add_argument('--max-open', type=int, help='Max directory handles open at once with --workers')
+    ap.add_argument('--snapshot', type=Path, help='Snapshot file: reuse unchanged directories from it, then update it')
+    ap.add_argument('--diff', type=Path, help='Earlier snapshot to compare against (prints largest growth)')
     ap.add_argument('--csv', type=Path, help='CSV path for largest files report')
     ap.add_argument('--md', type=Path, help='Markdown path for full report')
     args = ap.parse_args()
@@ -59,23 +278,43 @@ def main():
     root = args.root.expanduser().resolve()
     assert root.exists(), f"Root not found: {root}"
 
-    # Per top-level child size
-    child_sizes = []
-    for child in root.iterdir():
-        if child.is_dir():
-            s = dir_size(child)
-            child_sizes.append((child.name, s))
+    # Reuse an earlier snapshot only if it was taken of the same root with
+    # at least as many top files per directory.
+    prev = records = None
+    if args.snapshot:
+        prev, records = {}, {}
+    if args.snapshot and args.snapshot.exists():
+        header, cached, _ = load_snapshot(args.snapshot)
+        if header['root'] == str(root) and header['top_n'] >= args.top:
+            prev = cached
 
-    largest = top_n_files(root, args.top)
+    # Single walk: directory sizes at every depth + top N files
+    dir_sizes, largest = scan_tree(root, args.top, args.workers, args.max_open, prev, records)
+    child_sizes = sizes_at_depth(root, dir_sizes, args.depth)
+    heading = "Top-level directory sizes" if args.depth <= 1 else f"Directory sizes (depth <= {args.depth})"
 
     # Print summary to console
-    print("Top-level directory sizes:")
+    print(f"{heading}:")
     for name, s in sorted(child_sizes, key=lambda x: x[1], reverse=True):
         print(f" - {name}: {human_bytes(s)}")
     print("\nLargest files:")
     for sz, f in largest:
         print(f" - {f} ({human_bytes(sz)})")
 
+    if records is not None and prev:
+        reused = sum(1 for d, rec in records.items() if d in prev and rec[0] != NO_MTIME and prev[d][0] == rec[0])
+        print(f"\nReused {reused} of {len(dir_sizes)} directories from {args.snapshot}")
+
+    if args.diff:
+        _, _, old_totals = load_snapshot(args.diff)
+        print(f"\nLargest directory growth since {args.diff}:")
+        for delta, d in diff_snapshots(old_totals, dir_sizes, args.top):
+            print(f" - {d}/ (+{human_bytes(delta)})")
+
+    if args.snapshot:
+        save_snapshot(args.snapshot, root, args.top, records, dir_sizes)
+        print(f"[OK] Wrote snapshot: {args.snapshot}")
+
     # Optional CSV
     if args.csv:
         with args.csv.open('w', newline='', encoding='utf-8') as fo:
@@ -87,7 +326,7 @@ def main():
 
     # Optional Markdown
     if args.md:
-        lines = ["# Disk Usage Report\n\n", "## Top-level directory sizes\n\n"]
+        lines = ["# Disk Usage Report\n\n", f"## {heading}\n\n"]
         for name, s in sorted(child_sizes, key=lambda x: x[1], reverse=True):
             lines.append(f"- **{name}**: {human_bytes(s)}\n")
         lines.append("\n## Largest files\n\n")
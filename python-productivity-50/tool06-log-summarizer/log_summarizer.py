@@ -10,31 +10,667 @@ experienced programmers who are newer to Python.
 
 from pathlib import Path
 import argparse
+import calendar
+import gzip
+import json
+import mmap
+import os
 import re
-from collections import Counter
+import sqlite3
+import sys
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 # --- Implementation notes ---------------------------------------------------
-# - Scans *.log files recursively from --root.
-# - Each regex pattern gets its own count per file.
+# - Scans *.log and gzip-rotated *.log.gz files recursively from --root.
+# - Files are never decoded or split into a list of lines: plain logs are
+#   mmap'ed, .gz logs are read in CHUNK_SIZE binary chunks, and patterns are
+#   compiled as UTF-8 `bytes` regexes. Memory use stays constant regardless
+#   of file size.
+# - Matching keeps the per-line meaning of the patterns: a buffer-wide
+#   re.MULTILINE search only nominates lines, and each nominated line is
+#   re.searched on its own, without its trailing \r (CRLF logs), so ^, $,
+#   \A and \Z refer to that line. `$` is searched as (?=\r?$) so CRLF line
+#   ends are nominated too. The empty string after the final newline is not
+#   a line, so ^$ finds no phantom match at the end of a buffer, gz chunk
+#   or shard. Patterns whose buffer-wide hits would not cover their
+#   per-line hits (\A, \Z, lookarounds) are tried on every line.
+# - Each regex pattern gets its own count per file (matching lines, so a line
+#   with several hits counts once).
+# - All patterns are also compiled into one alternation, so each buffer is
+#   scanned once to find candidate lines; only those lines are then checked
+#   per pattern (plain substring test for literal patterns, regex otherwise).
+#   \A, \Z and lookaround patterns stay out of the alternation and are
+#   checked line by line (see above); with backreferences, or if the
+#   alternation does not compile, each pattern searches the buffer on its
+#   own. test_log_summarizer.py checks all paths against the original
+#   splitlines() loop.
+# - --jobs N summarizes on a process pool. Each task is one file, or one
+#   SHARD_SIZE byte range of a large plain log (ranges are snapped to line
+#   starts, so every line is counted by exactly one shard; a shard's end is
+#   the next line's start and the empty string there is never a match, so
+#   ^$ gains nothing at shard boundaries). Workers return
+#   partial Counters that are merged in task order, so the result equals the
+#   serial one. At most N * QUEUE_PER_WORKER tasks are queued at a time.
+# - --follow keeps running and polls *.log files (stat only; the stdlib has
+#   no inotify binding). Only bytes appended since the stored offset are
+#   read, and only complete lines are counted, so cost grows with new data,
+#   not total volume. Offsets (with device/inode) and counters are saved to
+#   --state so a restart resumes where it stopped. A file whose inode changed
+#   was rotated: the unread tail of the old inode is read first if it is
+#   still in the same directory (e.g. app.log.1), then the new file from 0.
+#   A file smaller than its offset was truncated and is re-read from 0.
+# - --index FILE also stores per-pattern, per-file, per-minute counts in
+#   SQLite. Timestamps come from --ts-regex (matched groups joined by a
+#   space) parsed with --ts-format; matching lines without a timestamp are
+#   kept in a NULL bucket (counted in totals, outside every time range).
+#   Files whose size, mtime, patterns and --ts-regex/--ts-format are
+#   unchanged are skipped on re-indexing; rows for logs under --root that
+#   have disappeared are deleted, and the report only covers files below
+#   --root.
+#   `log_summarizer.py query --index FILE ...` answers time-range and
+#   per-file questions from the index alone.
 # - Optional Markdown report summarizes totals.
 # ----------------------------------------------------------------------------
 
-def summarize_logs(root: Path, patterns):
+CHUNK_SIZE = 1 << 20  # bytes per read when streaming compressed logs
+SHARD_SIZE = 256 << 20  # plain logs larger than this are split across --jobs
+QUEUE_PER_WORKER = 4  # tasks queued per worker with --jobs
+DEFAULT_TS_REGEX = r'(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2})'
+DEFAULT_TS_FORMAT = '%Y-%m-%d %H:%M'
+
+_REGEX_META = set(b'.^$*+?{}[]\\|()')
+# Constructs whose result depends on where the searched string ends (\A, \Z,
+# lookarounds): a buffer-wide search cannot stand in for a per-line one.
+_NEEDS_LINE = re.compile(rb'\\[AZ]|\(\?<?[=!]')
+_BACKREF = re.compile(rb'\\[1-9]|\(\?P=')
+
+
+def _allow_cr_before_eol(pattern: bytes) -> bytes:
+    r"""Rewrite each `$` outside [...] as (?=\r?$) so CRLF line ends still match."""
+    out = bytearray()
+    i, n = 0, len(pattern)
+    in_class = False
+    while i < n:
+        c = pattern[i:i + 1]
+        if c == b'\\':
+            out += pattern[i:i + 2]
+            i += 2
+            continue
+        if in_class:
+            in_class = c != b']'
+        elif c == b'[':
+            in_class = True
+            out += c
+            i += 1
+            if pattern[i:i + 1] == b'^':
+                out += b'^'
+                i += 1
+            if pattern[i:i + 1] == b']':  # a leading ] is literal
+                out += b']'
+                i += 1
+            continue
+        elif c == b'$':
+            out += rb'(?=\r?$)'
+            i += 1
+            continue
+        out += c
+        i += 1
+    return bytes(out)
+
+
+class PatternSet:
+    r"""Compiled form of the --patterns list.
+
+    Counting semantics are those of searching each line on its own: lines
+    end at b'\n', and a trailing b'\r' is not part of the line.
+
+    regexes  : {pattern: bytes regex} applied to a single line (no flags).
+    literals : {pattern: bytes} for patterns without regex metacharacters.
+    scan     : {pattern: re.MULTILINE regex} for searching a whole buffer for
+               candidate lines; `$` also matches before b'\r\n'.
+    per_line : patterns that must be tried on every line (\A, \Z, lookarounds).
+    combined : one regex matching any `scan` pattern, or None if the set
+               cannot be combined safely.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        raw = {p: p.encode('utf-8') for p in self.patterns}
+        self.regexes = {p: re.compile(b) for p, b in raw.items()}
+        self.literals = {p: b for p, b in raw.items() if not _REGEX_META.intersection(b)}
+        self.per_line = [p for p, b in raw.items() if _NEEDS_LINE.search(b)]
+        self.scan = {p: re.compile(_allow_cr_before_eol(b), re.MULTILINE)
+                     for p, b in raw.items() if p not in self.per_line}
+        self.combined = None
+        if self.scan and not any(_BACKREF.search(raw[p]) for p in self.scan):
+            try:
+                self.combined = re.compile(b'|'.join(b'(?:' + rx.pattern + b')' for rx in self.scan.values()),
+                                           re.MULTILINE)
+            except re.error:
+                pass  # e.g. inline flags or duplicate group names across patterns
+
+
+def compile_patterns(patterns) -> PatternSet:
+    """Compile text patterns into line-oriented bytes regexes."""
+    return PatternSet(patterns)
+
+
+def _line_bounds(buf, i: int, end: int):
+    """Return (start, stop) of the line containing offset i in buf[:end]."""
+    start = buf.rfind(b'\n', 0, i) + 1
+    stop = buf.find(b'\n', i, end)
+    return start, (end if stop == -1 else stop)
+
+
+def _line(buf, start: int, stop: int) -> bytes:
+    r"""The line buf[start:stop] without a trailing b'\r'."""
+    line = buf[start:stop]
+    return line[:-1] if line.endswith(b'\r') else line
+
+
+def _count_line(line: bytes, group, pset: PatternSet, counts: Counter, bucket):
+    keyed = False
+    for p in group:
+        lit = pset.literals.get(p)
+        if (lit in line) if lit is not None else pset.regexes[p].search(line):
+            if not bucket:
+                counts[p] += 1
+                continue
+            if not keyed:
+                key, keyed = bucket(line), True
+            counts[(p, key)] += 1
+
+
+def count_matching_lines(buf, pset: PatternSet, counts: Counter, end: int, start: int = 0,
+                         bucket=None):
+    """Add to counts[p] the number of lines in buf[start:end] that pattern p matches.
+
+    `buf` is any bytes-like object (bytes, mmap); `start` must be a line
+    start. Lines are never split out of the buffer except the few that a
+    pattern actually hits (and every line for `per_line` patterns). With a
+    `bucket(line) -> key` callable, counts are keyed by (p, key) instead.
+    """
+    if pset.combined is not None:
+        _count_candidates(buf, pset.combined, list(pset.scan), pset, counts, end, start, bucket)
+    else:
+        for p, rx in pset.scan.items():
+            _count_candidates(buf, rx, [p], pset, counts, end, start, bucket)
+    if pset.per_line:
+        _count_every_line(buf, pset.per_line, pset, counts, end, start, bucket)
+
+
+def _count_candidates(buf, rx, group, pset: PatternSet, counts: Counter, end: int, start: int,
+                      bucket):
+    """Search the buffer with `rx`; check each line it hits against `group`."""
+    after_last_nl = end == start or buf[end - 1] == 0x0A  # buf[end:end] is not a line
+    pos = start
+    while pos < end:
+        m = rx.search(buf, pos, end)
+        if m is None or (m.start() == end and after_last_nl):
+            break
+        line_start, stop = _line_bounds(buf, m.start(), end)
+        # The hit only nominates the line; the patterns are re-checked on
+        # the line alone (it may have spilled over via \s, or hit a \r).
+        _count_line(_line(buf, line_start, stop), group, pset, counts, bucket)
+        pos = stop + 1
+
+
+def _count_every_line(buf, group, pset: PatternSet, counts: Counter, end: int, start: int,
+                      bucket):
+    pos = start
+    while pos < end:
+        stop = buf.find(b'\n', pos, end)
+        if stop == -1:
+            stop = end
+        _count_line(_line(buf, pos, stop), group, pset, counts, bucket)
+        pos = stop + 1
+
+
+def _count_stream(fh, pset: PatternSet, counts: Counter, bucket=None):
+    """Feed a binary file object through count_matching_lines in chunks."""
+    tail = b''
+    while True:
+        chunk = fh.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        buf = tail + chunk
+        end = buf.rfind(b'\n') + 1  # only complete lines; keep the rest
+        count_matching_lines(buf, pset, counts, end, 0, bucket)
+        tail = buf[end:]
+    if tail:
+        count_matching_lines(tail, pset, counts, len(tail), 0, bucket)
+
+
+def scan_file(f: Path, pset: PatternSet, bucket=None) -> Counter:
+    """Return Counter {pattern: matching line count} for one log file.
+
+    With `bucket`, keys are (pattern, bucket(line)); see count_matching_lines.
+    """
+    counts = Counter()
+    if f.suffix == '.gz':
+        with gzip.open(f, 'rb') as fh:
+            _count_stream(fh, pset, counts, bucket)
+        return counts
+    with f.open('rb') as fh:
+        try:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                count_matching_lines(mm, pset, counts, len(mm), 0, bucket)
+        except (ValueError, OSError):
+            # Empty files and special files cannot be mapped; stream instead.
+            fh.seek(0)
+            _count_stream(fh, pset, counts, bucket)
+    return counts
+
+
+def iter_log_files(root: Path):
+    """Yield *.log and *.log.gz files below root."""
+    yield from root.rglob('*.log')
+    yield from root.rglob('*.log.gz')
+
+
+def iter_plain_logs(root: Path):
+    """Yield *.log files below root (compressed archives never grow)."""
+    yield from root.rglob('*.log')
+
+
+@lru_cache(maxsize=8)
+def _worker_patterns(patterns: tuple) -> PatternSet:
+    # Compiled once per worker process, not once per task.
+    return compile_patterns(patterns)
+
+
+def _next_line_start(buf, i: int) -> int:
+    """Offset of the first line starting at or after i."""
+    if i <= 0:
+        return 0
+    nl = buf.find(b'\n', i - 1)
+    return len(buf) if nl == -1 else nl + 1
+
+
+def scan_shard(path: str, patterns: tuple, start: int = 0, stop: int = None) -> Counter:
+    """Count matches in the lines of `path` that begin within [start, stop).
+
+    stop=None scans the whole file (any format). Runs in worker processes.
+    """
+    pset = _worker_patterns(patterns)
+    if stop is None:
+        return scan_file(Path(path), pset)
+    counts = Counter()
+    with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        begin, end = _next_line_start(mm, start), _next_line_start(mm, stop)
+        count_matching_lines(mm, pset, counts, end, begin)
+    return counts
+
+
+def _plan_tasks(files, shard_size: int):
+    """Yield (file, start, stop) tasks: whole files, or shards of big plain logs."""
+    for f in files:
+        try:
+            size = f.stat().st_size
+        except OSError:
+            size = 0
+        if f.suffix == '.gz' or size <= shard_size:
+            yield f, 0, None
+        else:
+            for start in range(0, size, shard_size):
+                yield f, start, min(start + shard_size, size)
+
+
+def _summarize_parallel(root: Path, patterns, jobs: int, shard_size: int):
+    """Yield (file, Counter) for every task, in task order, using a process pool."""
+    key = tuple(patterns)
+
+    def collect(f, future):
+        try:
+            return f, future.result()
+        except Exception as e:
+            print(f"[WARN] Failed to read {f}: {e}")
+            return f, Counter()
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for f, start, stop in _plan_tasks(iter_log_files(root), shard_size):
+            pending.append((f, pool.submit(scan_shard, str(f), key, start, stop)))
+            if len(pending) >= jobs * QUEUE_PER_WORKER:
+                yield collect(*pending.popleft())
+        while pending:
+            yield collect(*pending.popleft())
+
+
+def summarize_logs(root: Path, patterns, jobs: int = 1, shard_size: int = SHARD_SIZE):
     counters = {p: Counter() for p in patterns}
-    regexes = {p: re.compile(p) for p in patterns}
 
-    for f in root.rglob('*.log'):
+    if jobs > 1:
+        for f, counts in _summarize_parallel(root, patterns, jobs, shard_size):
+            for p, n in counts.items():
+                counters[p][f.name] += n
+        return counters
+
+    pset = compile_patterns(patterns)
+    for f in iter_log_files(root):
         try:
-            for line in f.read_text(errors='ignore').splitlines():
-                for p, rx in regexes.items():
-                    if rx.search(line):
-                        counters[p][f.name] += 1
+            for p, n in scan_file(f, pset).items():
+                counters[p][f.name] += n
         except Exception as e:
             print(f"[WARN] Failed to read {f}: {e}")
 
     return counters
 
 
+def _find_by_inode(directory: Path, dev: int, ino: int):
+    """Return the entry in `directory` with this (dev, inode), or None."""
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                st = entry.stat(follow_symlinks=False)
+                if (st.st_dev, st.st_ino) == (dev, ino):
+                    return Path(entry.path)
+    except OSError:
+        pass
+    return None
+
+
+def _count_appended(path: Path, offset: int, pset: PatternSet, counts: Counter) -> int:
+    """Count complete lines of `path` after `offset`; return the new offset.
+
+    A trailing line without a newline is left for the next call.
+    """
+    with path.open('rb') as fh:
+        fh.seek(offset)
+        tail = b''
+        while True:
+            chunk = fh.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            buf = tail + chunk
+            end = buf.rfind(b'\n') + 1
+            count_matching_lines(buf, pset, counts, end)
+            offset += end
+            tail = buf[end:]
+    return offset
+
+
+class LogFollower:
+    """Keep per-pattern counters up to date as *.log files under `root` grow.
+
+    State ({path: [dev, ino, offset]} plus counters) is loaded from and saved
+    to `state_path` if given; it is ignored if the pattern list changed.
+    """
+
+    def __init__(self, root: Path, patterns, state_path: Path = None):
+        self.root = root
+        self.patterns = list(patterns)
+        self.pset = compile_patterns(patterns)
+        self.state_path = state_path
+        self.offsets = {}
+        self.counters = {p: Counter() for p in self.patterns}
+        if state_path and state_path.exists():
+            state = json.loads(state_path.read_text(encoding='utf-8'))
+            if state.get('patterns') == self.patterns:
+                self.offsets = {k: tuple(v) for k, v in state['files'].items()}
+                for p, counts in state['counters'].items():
+                    self.counters[p].update(counts)
+
+    def _add(self, name: str, counts: Counter):
+        for p, n in counts.items():
+            self.counters[p][name] += n
+
+    def poll(self) -> int:
+        """Read everything appended since the last poll; return bytes consumed."""
+        consumed = 0
+        # Latest offset per inode, so a log renamed to another *.log name
+        # continues where it was instead of being counted again.
+        known = {(dev, ino): off for dev, ino, off in self.offsets.values()}
+        offsets = {}
+        for f in iter_plain_logs(self.root):
+            key = str(f)
+            try:
+                st = f.stat()
+                prev = self.offsets.get(key)
+                if prev is not None and prev[:2] != (st.st_dev, st.st_ino):
+                    # Rotated: finish the old file if it is still nearby.
+                    old = _find_by_inode(f.parent, *prev[:2])
+                    if old is not None:
+                        start = known[prev[:2]]
+                        counts = Counter()
+                        known[prev[:2]] = _count_appended(old, start, self.pset, counts)
+                        consumed += known[prev[:2]] - start
+                        self._add(f.name, counts)
+                ident = (st.st_dev, st.st_ino)
+                offset = known.get(ident, 0)
+                if st.st_size < offset:
+                    offset = 0  # truncated in place
+                if st.st_size > offset:
+                    counts = Counter()
+                    new_offset = _count_appended(f, offset, self.pset, counts)
+                    consumed += new_offset - offset
+                    self._add(f.name, counts)
+                    offset = new_offset
+                known[ident] = offset
+                offsets[key] = (st.st_dev, st.st_ino, offset)
+            except OSError as e:
+                print(f"[WARN] Failed to read {f}: {e}")
+        self.offsets = offsets  # forget files that disappeared
+        return consumed
+
+    def save(self):
+        if not self.state_path:
+            return
+        state = {
+            'patterns': self.patterns,
+            'files': self.offsets,
+            'counters': {p: dict(c) for p, c in self.counters.items()},
+        }
+        tmp = self.state_path.with_name(self.state_path.name + '.tmp')
+        tmp.write_text(json.dumps(state), encoding='utf-8')
+        os.replace(tmp, self.state_path)
+
+
+def follow_logs(root: Path, patterns, state_path: Path = None, interval: float = 2.0,
+                report_every: float = 60.0, out_md: Path = None):
+    """Poll forever (until Ctrl+C), printing a summary every `report_every` seconds."""
+    follower = LogFollower(root, patterns, state_path)
+    next_report = time.monotonic()
+    try:
+        while True:
+            if follower.poll():
+                follower.save()
+            if time.monotonic() >= next_report:
+                print_summary(follower.counters)
+                if out_md:
+                    write_markdown(follower.counters, out_md)
+                next_report = time.monotonic() + report_every
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        follower.save()
+        print_summary(follower.counters)
+
+
+def print_summary(counters):
+    for pat, counter in counters.items():
+        total = sum(counter.values())
+        print(f"Pattern '{pat}': total matches = {total}")
+        for fname, cnt in counter.most_common()[:10]:
+            print(f"  - {fname}: {cnt}")
+
+
+class MinuteBucket:
+    """Map a log line to minutes since the epoch (naive timestamps, no tz), or None."""
+
+    def __init__(self, ts_regex: str = DEFAULT_TS_REGEX, ts_format: str = DEFAULT_TS_FORMAT):
+        self.rx = re.compile(ts_regex.encode('utf-8'))
+        self.ts_regex = ts_regex
+        self.ts_format = ts_format
+        self._cache = {}  # timestamp text -> minute; lines share few distinct minutes
+
+    def __call__(self, line: bytes):
+        m = self.rx.search(line)
+        if m is None:
+            return None
+        # Optional groups that did not take part in the match are left out.
+        text = b' '.join(g for g in m.groups() if g is not None) if self.rx.groups else m.group(0)
+        minute = self._cache.get(text)
+        if minute is None and text not in self._cache:
+            try:
+                dt = datetime.strptime(text.decode('ascii', 'replace'), self.ts_format)
+                minute = calendar.timegm(dt.timetuple()) // 60
+            except ValueError:
+                minute = None
+            if len(self._cache) > 100_000:
+                self._cache.clear()
+            self._cache[text] = minute
+        return minute
+
+
+def parse_minute(text: str, ts_format: str = DEFAULT_TS_FORMAT) -> int:
+    """Parse a --from/--to value (same format as log timestamps) to epoch minutes."""
+    return calendar.timegm(datetime.strptime(text.replace('T', ' '), ts_format).timetuple()) // 60
+
+
+def format_minute(minute: int) -> str:
+    return datetime.fromtimestamp(minute * 60, timezone.utc).strftime('%Y-%m-%d %H:%M')
+
+
+def open_index(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path))
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, name TEXT NOT NULL,
+            size INTEGER, mtime_ns INTEGER, patterns TEXT);
+        CREATE TABLE IF NOT EXISTS counts (
+            file_id INTEGER NOT NULL, pattern TEXT NOT NULL, minute INTEGER, n INTEGER NOT NULL);
+        CREATE INDEX IF NOT EXISTS counts_pattern_minute ON counts (pattern, minute);
+        CREATE INDEX IF NOT EXISTS counts_file ON counts (file_id);
+    """)
+    return conn
+
+
+def build_index(root: Path, patterns, index_path: Path, bucket: MinuteBucket):
+    """Index every log under root; return (indexed, skipped, pruned) file counts.
+
+    Rows for files under root that no longer exist are removed. A file is
+    rescanned when its size, mtime, the patterns or the timestamp settings
+    differ from what its rows were built with.
+    """
+    pset = compile_patterns(patterns)
+    key = json.dumps([list(patterns), bucket.ts_regex, bucket.ts_format])
+    conn = open_index(index_path)
+    indexed = skipped = 0
+    seen = set()
+    try:
+        for f in iter_log_files(root):
+            seen.add(str(f))
+            try:
+                st = f.stat()
+                row = conn.execute("SELECT id, size, mtime_ns, patterns FROM files WHERE path=?",
+                                   (str(f),)).fetchone()
+                if row and row[1:] == (st.st_size, st.st_mtime_ns, key):
+                    skipped += 1
+                    continue
+                counts = scan_file(f, pset, bucket)
+            except Exception as e:
+                print(f"[WARN] Failed to read {f}: {e}")
+                continue
+            with conn:
+                if row:
+                    conn.execute("DELETE FROM counts WHERE file_id=?", (row[0],))
+                    conn.execute("UPDATE files SET size=?, mtime_ns=?, patterns=? WHERE id=?",
+                                 (st.st_size, st.st_mtime_ns, key, row[0]))
+                    file_id = row[0]
+                else:
+                    file_id = conn.execute(
+                        "INSERT INTO files (path, name, size, mtime_ns, patterns) VALUES (?, ?, ?, ?, ?)",
+                        (str(f), f.name, st.st_size, st.st_mtime_ns, key)).lastrowid
+                conn.executemany("INSERT INTO counts VALUES (?, ?, ?, ?)",
+                                 [(file_id, p, minute, n) for (p, minute), n in counts.items()])
+            indexed += 1
+        stale = [(file_id,) for file_id, path in conn.execute("SELECT id, path FROM files")
+                 if path not in seen and Path(path).is_relative_to(root)]
+        with conn:
+            conn.executemany("DELETE FROM counts WHERE file_id=?", stale)
+            conn.executemany("DELETE FROM files WHERE id=?", stale)
+    finally:
+        conn.close()
+    return indexed, skipped, len(stale)
+
+
+def query_index(index_path: Path, patterns=None, start: int = None, stop: int = None,
+                file_name: str = None, by: str = 'file', root: Path = None):
+    """Return [(group, pattern, count)] from the index.
+
+    start/stop are epoch minutes (stop exclusive); `by` groups rows per
+    'file', 'minute', 'hour' or 'day' ('total' for one row per pattern).
+    `root` limits the rows to files indexed from below that folder.
+    """
+    group = {
+        'file': "f.name",
+        'minute': "c.minute",
+        'hour': "c.minute / 60 * 60",
+        'day': "c.minute / 1440 * 1440",
+        'total': "''",
+    }[by]
+    where, params = [], []
+    if patterns:
+        where.append(f"c.pattern IN ({','.join('?' * len(patterns))})")
+        params.extend(patterns)
+    if start is not None:
+        where.append("c.minute >= ?")
+        params.append(start)
+    if stop is not None:
+        where.append("c.minute < ?")
+        params.append(stop)
+    if file_name:
+        where.append("f.name = ?")
+        params.append(file_name)
+    if root is not None:
+        prefix = os.path.join(str(root), '')
+        where.append("substr(f.path, 1, ?) = ?")
+        params.extend([len(prefix), prefix])
+    sql = (f"SELECT {group} AS g, c.pattern, SUM(c.n) FROM counts c JOIN files f ON f.id = c.file_id"
+           f"{' WHERE ' + ' AND '.join(where) if where else ''} GROUP BY g, c.pattern ORDER BY g, c.pattern")
+    conn = open_index(index_path)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    if by in ('minute', 'hour', 'day'):
+        rows = [(format_minute(g) if g is not None else '(no timestamp)', p, n) for g, p, n in rows]
+    return rows
+
+
+def counters_from_index(index_path: Path, patterns, root: Path = None):
+    """Rebuild the summarize_logs() result ({pattern: Counter(file name)}) from the index."""
+    counters = {p: Counter() for p in patterns}
+    for name, p, n in query_index(index_path, patterns, by='file', root=root):
+        counters[p][name] += n
+    return counters
+
+
+def query_main(argv):
+    ap = argparse.ArgumentParser(prog='log_summarizer.py query',
+                                 description='Answer count questions from a log index.')
+    ap.add_argument('--index', type=Path, required=True, help='Index built with --index')
+    ap.add_argument('--patterns', nargs='+', help='Only these patterns (default: all)')
+    ap.add_argument('--from', dest='start', help='Start time, inclusive (e.g., "2026-02-18 02:00")')
+    ap.add_argument('--to', dest='stop', help='End time, exclusive (e.g., "2026-02-18 03:00")')
+    ap.add_argument('--file', help='Only this log file name')
+    ap.add_argument('--by', choices=['file', 'minute', 'hour', 'day', 'total'], default='total',
+                    help='How to group the counts')
+    ap.add_argument('--ts-format', default=DEFAULT_TS_FORMAT, help='Format of --from/--to')
+    args = ap.parse_args(argv)
+
+    index = args.index.expanduser().resolve()
+    assert index.exists(), f"Index not found: {index}"
+    start = parse_minute(args.start, args.ts_format) if args.start else None
+    stop = parse_minute(args.stop, args.ts_format) if args.stop else None
+    for group, pat, n in query_index(index, args.patterns, start, stop, args.file, args.by):
+        print(f"{group}\t{pat}\t{n}" if args.by != 'total' else f"{pat}\t{n}")
+
+
 def write_markdown(counters, out_md: Path):
     lines = ["# Log Summary\n\n"]
     for pat, counter in counters.items():
@@ -48,23 +684,48 @@ def write_markdown(counters, out_md: Path):
 
 
 def main():
-    ap = argparse.ArgumentParser(description='Summarize log files by regex patterns.')
+    if sys.argv[1:2] == ['query']:
+        query_main(sys.argv[2:])
+        return
+
+    ap = argparse.ArgumentParser(description='Summarize log files by regex patterns.',
+                                 epilog='Run "%(prog)s query --help" to query an index.')
     ap.add_argument('--root', type=Path, required=True, help='Root folder to scan (recursively)')
     ap.add_argument('--patterns', nargs='+', required=True, help='Regex patterns to search for (e.g., ERROR WARN)')
     ap.add_argument('--out', type=Path, help='Write summary to Markdown file')
+    ap.add_argument('--jobs', type=int, default=1, help='Worker processes (default: 1)')
+    ap.add_argument('--shard-mb', type=int, default=SHARD_SIZE >> 20,
+                    help='With --jobs, split plain logs larger than this many MB across workers')
+    ap.add_argument('--index', type=Path, help='Also build/update a per-minute SQLite index')
+    ap.add_argument('--ts-regex', default=DEFAULT_TS_REGEX, help='With --index, regex locating the timestamp')
+    ap.add_argument('--ts-format', default=DEFAULT_TS_FORMAT,
+                    help='With --index, strptime format of the --ts-regex groups that matched, joined by a space')
+    ap.add_argument('--follow', action='store_true', help='Keep running and count lines as they are appended')
+    ap.add_argument('--state', type=Path, help='With --follow, file to persist offsets and counters')
+    ap.add_argument('--interval', type=float, default=2.0, help='With --follow, seconds between polls')
+    ap.add_argument('--report-every', type=float, default=60.0, help='With --follow, seconds between reports')
     args = ap.parse_args()
 
     root = args.root.expanduser().resolve()
     assert root.exists(), f"Root not found: {root}"
 
-    counters = summarize_logs(root, args.patterns)
+    if args.follow:
+        out = args.out.expanduser().resolve() if args.out else None
+        state = args.state.expanduser().resolve() if args.state else None
+        follow_logs(root, args.patterns, state, args.interval, args.report_every, out)
+        return
+
+    if args.index:
+        index = args.index.expanduser().resolve()
+        indexed, skipped, pruned = build_index(root, args.patterns, index,
+                                               MinuteBucket(args.ts_regex, args.ts_format))
+        print(f"[OK] Indexed {indexed} files ({skipped} unchanged, {pruned} removed) into {index}")
+        counters = counters_from_index(index, args.patterns, root)
+    else:
+        counters = summarize_logs(root, args.patterns, args.jobs, args.shard_mb << 20)
 
     # Console output
-    for pat, counter in counters.items():
-        total = sum(counter.values())
-        print(f"Pattern '{pat}': total matches = {total}")
-        for fname, cnt in counter.most_common()[:10]:
-            print(f"  - {fname}: {cnt}")
+    print_summary(counters)
 
     if args.out:
         write_markdown(counters, args.out.expanduser().resolve())
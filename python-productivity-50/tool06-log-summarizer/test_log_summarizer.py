@@ -0,0 +1,207 @@
+"""Counts must equal the original line-by-line loop (splitlines + re.search)."""
+
+import gzip
+import re
+from collections import Counter
+
+import pytest
+
+import log_summarizer as ls
+
+PATTERNS = ['ERROR', 'ERROR$', r'^ERROR', r'\AERROR', r'ERROR\Z', '^$', r'^\s*$', r'x\s',
+            r'(?<=x )ERROR', r'ERROR(?!\s)', '[$]', r'R$|^W', r'\bERROR\b']
+LINES = ['ERROR', 'WARN', 'info', '', 'ERROR x', 'x ERROR', '  ', 'a $ b', 'WARN\tERROR']
+
+
+def baseline(text: str, patterns) -> Counter:
+    counts = Counter()
+    for line in text.splitlines():
+        for p in patterns:
+            if re.search(p, line):
+                counts[p] += 1
+    return counts
+
+
+def sample(newline: str, trailing: bool) -> str:
+    lines = [LINES[(i * 7) % len(LINES)] for i in range(200)]
+    return newline.join(lines) + (newline if trailing else '')
+
+
+TEXTS = {
+    'lf': sample('\n', True),
+    'crlf': sample('\r\n', True),
+    'lf_unterminated': sample('\n', False),
+    'crlf_unterminated': sample('\r\n', False),
+    'blank_lines': '\n\n\n',
+    'empty': '',
+}
+
+
+@pytest.mark.parametrize('name', sorted(TEXTS))
+@pytest.mark.parametrize('patterns', [PATTERNS, PATTERNS + [r'(E)RROR.*\1?']],
+                         ids=['combined', 'per-pattern'])
+def test_scan_file_matches_baseline(tmp_path, monkeypatch, name, patterns):
+    monkeypatch.setattr(ls, 'CHUNK_SIZE', 37)  # many gz chunks
+    text = TEXTS[name]
+    plain = tmp_path / 'app.log'
+    plain.write_bytes(text.encode())
+    packed = tmp_path / 'app.log.gz'
+    with gzip.open(packed, 'wb') as g:
+        g.write(text.encode())
+
+    pset = ls.compile_patterns(patterns)
+    expected = +baseline(text, patterns)
+    assert +ls.scan_file(plain, pset) == expected
+    assert +ls.scan_file(packed, pset) == expected
+
+
+@pytest.mark.parametrize('name', ['lf', 'crlf', 'crlf_unterminated'])
+@pytest.mark.parametrize('shard', [5, 64, 1000])
+def test_shards_match_baseline(tmp_path, name, shard):
+    # Shard ends fall on line starts; no shard may count the empty string there.
+    text = TEXTS[name]
+    f = tmp_path / 'app.log'
+    f.write_bytes(text.encode())
+    size = f.stat().st_size
+    counts = Counter()
+    for start in range(0, size, shard):
+        counts += ls.scan_shard(str(f), tuple(PATTERNS), start, min(start + shard, size))
+    assert +counts == +baseline(text, PATTERNS)
+
+
+def test_parallel_summary_matches_serial(tmp_path):
+    for name in ('lf', 'crlf'):
+        (tmp_path / f'{name}.log').write_bytes(TEXTS[name].encode())
+    serial = ls.summarize_logs(tmp_path, PATTERNS)
+    assert ls.summarize_logs(tmp_path, PATTERNS, jobs=2, shard_size=64) == serial
+
+
+def test_index_forgets_deleted_logs(tmp_path):
+    root = tmp_path / 'logs'
+    root.mkdir()
+    (root / 'a.log').write_text('ERROR\nERROR\nok\n')
+    (root / 'b.log').write_text('ERROR\n')
+    index = tmp_path / 'index.db'
+    bucket = ls.MinuteBucket(ls.DEFAULT_TS_REGEX, ls.DEFAULT_TS_FORMAT)
+    assert ls.build_index(root, ['ERROR'], index, bucket) == (2, 0, 0)
+
+    (root / 'a.log').unlink()
+    assert ls.build_index(root, ['ERROR'], index, bucket) == (0, 1, 1)
+    assert ls.counters_from_index(index, ['ERROR'], root) == {'ERROR': Counter({'b.log': 1})}
+
+
+def test_index_rebuilds_when_timestamp_settings_change(tmp_path):
+    root = tmp_path / 'logs'
+    root.mkdir()
+    (root / 'a.log').write_text('2026-02-18 02:05:59 ERROR\n2026-02-18 02:06:01 ERROR\n')
+    index = tmp_path / 'index.db'
+    by_minute = ls.MinuteBucket()
+    assert ls.build_index(root, ['ERROR'], index, by_minute) == (1, 0, 0)
+    assert ls.build_index(root, ['ERROR'], index, by_minute) == (0, 1, 0)
+
+    by_hour = ls.MinuteBucket(r'(\d{4}-\d{2}-\d{2}) (\d{2}):', '%Y-%m-%d %H')
+    assert ls.build_index(root, ['ERROR'], index, by_hour) == (1, 0, 0)
+    assert ls.query_index(index, by='minute') == [('2026-02-18 02:00', 'ERROR', 2)]
+
+
+def test_minute_bucket_skips_unmatched_optional_groups():
+    bucket = ls.MinuteBucket(r'(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2})(:\d{2})?', '%Y-%m-%d %H:%M')
+    assert bucket(b'2026-02-18 02:05 ERROR') == ls.parse_minute('2026-02-18 02:05')
+    assert bucket(b'no timestamp here') is None
+
+
+def timed_logs(root):
+    """Two logs over 02:00-04:59 with a mix of patterns, plus a line without a timestamp."""
+    root.mkdir()
+    texts = {}
+    for name, step in (('api.log', 7), ('db.log', 11)):
+        lines = [f"2026-02-18 {2 + m // 60:02d}:{m % 60:02d}:00 {LINES[(i * step) % len(LINES)]}"
+                 for i, m in enumerate(range(0, 180, 3))]
+        lines.append('ERROR without a timestamp')
+        texts[name] = '\n'.join(lines) + '\n'
+        (root / name).write_text(texts[name])
+    return texts
+
+
+def scan_range(texts, patterns, start, stop):
+    """Plain scan: {pattern: Counter(file)} over lines with start <= minute < stop."""
+    counters = {p: Counter() for p in patterns}
+    for name, text in texts.items():
+        for line in text.splitlines():
+            m = re.match(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2})', line)
+            if m is None or not start <= ls.parse_minute(m.group(1)) < stop:
+                continue
+            for p in patterns:
+                if re.search(p, line):
+                    counters[p][name] += 1
+    return counters
+
+
+def test_index_queries_match_plain_scan(tmp_path, capsys):
+    patterns = ['ERROR', 'WARN', r'x\s']
+    root = tmp_path / 'logs'
+    texts = timed_logs(root)
+    index = tmp_path / 'index.db'
+    ls.build_index(root, patterns, index, ls.MinuteBucket())
+
+    # Whole files: the index agrees with summarize_logs, including lines without a timestamp.
+    assert ls.counters_from_index(index, patterns, root) == ls.summarize_logs(root, patterns)
+
+    start, stop = ls.parse_minute('2026-02-18 02:30'), ls.parse_minute('2026-02-18 03:45')
+    expected = scan_range(texts, patterns, start, stop)
+    rows = ls.query_index(index, patterns, start, stop, by='file', root=root)
+    got = {p: Counter() for p in patterns}
+    for name, p, n in rows:
+        got[p][name] += n
+    assert got == expected
+
+    hourly = ls.query_index(index, ['ERROR'], start, stop, by='hour')
+    assert sum(n for _, _, n in hourly) == sum(expected['ERROR'].values())
+    assert [g for g, _, _ in hourly] == ['2026-02-18 02:00', '2026-02-18 03:00']
+
+    ls.query_main(['--index', str(index), '--from', '2026-02-18 02:30', '--to', '2026-02-18 03:45',
+                   '--file', 'db.log'])
+    printed = dict(line.split('\t') for line in capsys.readouterr().out.splitlines())
+    assert printed == {p: str(expected[p]['db.log']) for p in patterns if expected[p]['db.log']}
+
+
+def test_follow_survives_appends_and_rotation(tmp_path):
+    patterns = ['ERROR', 'WARN']
+    root = tmp_path / 'logs'
+    root.mkdir()
+    log = root / 'app.log'
+    state = tmp_path / 'state.json'
+    written = []
+
+    def append(path, text):
+        with path.open('a') as f:
+            f.write(text)
+        written.append(text)
+
+    def totals(follower):
+        return +Counter({p: sum(c.values()) for p, c in follower.counters.items()})
+
+    follower = ls.LogFollower(root, patterns, state)
+    append(log, 'ERROR 1\nWARN 1\n')
+    follower.poll()
+    append(log, 'ERROR 2\nWA')  # the unfinished line must wait for its newline
+    follower.poll()
+    assert totals(follower) == Counter({'ERROR': 2, 'WARN': 1})
+
+    append(log, 'RN 2\nERROR 3\n')
+    log.rename(root / 'app.log.1')  # rotated before the tail above was read
+    append(log, 'ERROR 4\n')
+    follower.poll()
+    follower.save()
+    expected = +baseline(''.join(written), patterns)
+    assert totals(follower) == expected
+
+    # Rotated to another *.log name, then picked up again from saved state.
+    log.rename(root / 'app-old.log')
+    append(root / 'app-old.log', 'WARN 3\n')
+    append(log, 'ERROR 5\n')
+    resumed = ls.LogFollower(root, patterns, state)
+    resumed.poll()
+    resumed.poll()  # nothing new: nothing counted twice
+    assert totals(resumed) == +baseline(''.join(written), patterns)
+    assert totals(resumed) == Counter({'ERROR': 5, 'WARN': 3})
@@ -10,11 +10,25 @@ experienced programmers who are newer to Python.
 
 from pathlib import Path
 import argparse
-from datetime import datetime
+import os
+import string
+import time
+from datetime import datetime, timedelta
 
 # --- Implementation notes ---------------------------------------------------
 # - Generates an opinionated Markdown day plan with time blocks.
 # - The filename embeds the ISO date for easy sorting.
+# - Batch mode (--from/--to, optionally --users/--users-file) writes many
+#   planners in one run: the template is compiled once into literal/field
+#   pairs (compile_template), the time-block table and per-day values are
+#   built once, and each (user, day) is a string join. Each user gets a
+#   subfolder, created once and listed once with scandir.
+# - Existing files are compared by size, then content; identical ones are
+#   not rewritten. Files that differ are assumed to have been filled in and
+#   are kept unless --force. A single --date run overwrites, as before.
+# - --template loads a custom str.format template. Fields: {date_human},
+#   {date}, {weekday}, {user}, {time_blocks}. Time blocks come from
+#   --day-start/--day-end/--block-minutes.
 # ----------------------------------------------------------------------------
 
 TEMPLATE = """# Daily Planner — {date_human}
@@ -27,15 +41,7 @@ TEMPLATE = """# Daily Planner — {date_human}
 ## Time-blocks
 | Time | Task |
 |------|------|
-| 09:00 |  |
-| 10:00 |  |
-| 11:00 |  |
-| 12:00 |  |
-| 13:00 |  |
-| 14:00 |  |
-| 15:00 |  |
-| 16:00 |  |
-| 17:00 |  |
+{time_blocks}
 
 ## Tasks / Notes
 - 
@@ -45,21 +51,128 @@ TEMPLATE = """# Daily Planner — {date_human}
 - What can be improved tomorrow?
 """
 
+TEMPLATE_FIELDS = ('date_human', 'date', 'weekday', 'user', 'time_blocks')
+
+
+def compile_template(text: str):
+    """Parse a str.format template once into [(literal, field, spec), ...]."""
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(text):
+        if field is not None and field not in TEMPLATE_FIELDS:
+            raise ValueError(f"Unknown template field {{{field}}}; use one of: {', '.join(TEMPLATE_FIELDS)}")
+        if conversion:
+            raise ValueError(f"Conversions like !{conversion} are not supported in templates")
+        parts.append((literal, field, spec))
+    return parts
+
+
+def render(parts, values: dict) -> str:
+    return ''.join(lit + (format(values[field], spec) if field is not None else '')
+                   for lit, field, spec in parts)
+
+
+def time_blocks(day_start: str, day_end: str, minutes: int) -> str:
+    """Markdown table rows from day_start to day_end (inclusive), every `minutes`."""
+    t = datetime.strptime(day_start, '%H:%M')
+    end = datetime.strptime(day_end, '%H:%M')
+    rows = []
+    while t <= end:
+        rows.append(f"| {t:%H:%M} |  |")
+        t += timedelta(minutes=minutes)
+    return '\n'.join(rows)
+
+
+def day_values(dt) -> dict:
+    return {'date_human': dt.strftime('%A, %d %B %Y'), 'date': dt.isoformat(), 'weekday': dt.strftime('%A')}
+
+
+def encode(text: str) -> bytes:
+    """Bytes as write_text() would store them (platform newlines)."""
+    return text.replace('\n', os.linesep).encode('utf-8')
+
+
+def write_batch(outdir: Path, days, users, parts, blocks: str, force: bool = False):
+    """Write planners for every (user, day); return (written, unchanged, kept)."""
+    written = unchanged = kept = 0
+    per_day = [(dt, day_values(dt)) for dt in days]
+    for user in users:
+        d = outdir / user if user else outdir
+        d.mkdir(parents=True, exist_ok=True)
+        with os.scandir(d) as it:
+            existing = {e.name: e.stat().st_size for e in it if e.is_file()}
+        for dt, values in per_day:
+            data = encode(render(parts, dict(values, user=user, time_blocks=blocks)))
+            name = f"planner_{dt.isoformat()}.md"
+            size = existing.get(name)
+            if size is not None:
+                if size == len(data) and (d / name).read_bytes() == data:
+                    unchanged += 1
+                    continue
+                if not force:
+                    kept += 1
+                    continue
+            with open(d / name, 'wb') as f:
+                f.write(data)
+            written += 1
+    return written, unchanged, kept
+
+
+def read_users(names: str | None, users_file: Path | None):
+    users = [u.strip() for u in (names or '').split(',') if u.strip()]
+    if users_file:
+        for line in users_file.read_text(encoding='utf-8').splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                users.append(line)
+    return users
+
+
 def main():
     ap = argparse.ArgumentParser(description='Generate a Markdown daily planner file.')
     ap.add_argument('--date', type=str, help='YYYY-MM-DD (defaults to today)')
     ap.add_argument('--out', type=Path, required=True, help='Output directory')
+    ap.add_argument('--from', dest='first', type=str, help='Batch mode: first date YYYY-MM-DD')
+    ap.add_argument('--to', dest='last', type=str, help='Batch mode: last date YYYY-MM-DD (inclusive)')
+    ap.add_argument('--users', type=str, help='Comma-separated names; one subfolder each')
+    ap.add_argument('--users-file', type=Path, help='File with one user name per line')
+    ap.add_argument('--template', type=Path, help='Custom Markdown template (str.format fields)')
+    ap.add_argument('--day-start', default='09:00', help='First time block (HH:MM)')
+    ap.add_argument('--day-end', default='17:00', help='Last time block (HH:MM)')
+    ap.add_argument('--block-minutes', type=int, default=60, help='Minutes per time block')
+    ap.add_argument('--force', action='store_true', help='Batch mode: overwrite planners that were edited')
     args = ap.parse_args()
 
+    if bool(args.first) != bool(args.last):
+        ap.error('--from and --to go together')
+    if args.block_minutes < 1:
+        ap.error('--block-minutes must be at least 1')
+    try:
+        parts = compile_template(args.template.read_text(encoding='utf-8') if args.template else TEMPLATE)
+    except ValueError as e:
+        ap.error(str(e))
+    blocks = time_blocks(args.day_start, args.day_end, args.block_minutes)
+    outdir = args.out.expanduser().resolve()
+    users = read_users(args.users, args.users_file)
+
+    if args.first or users:
+        first = datetime.strptime(args.first or args.date or datetime.today().strftime('%Y-%m-%d'), '%Y-%m-%d').date()
+        last = datetime.strptime(args.last, '%Y-%m-%d').date() if args.last else first
+        days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        t0 = time.perf_counter()
+        written, unchanged, kept = write_batch(outdir, days, users or [''], parts, blocks, args.force)
+        print(f"[OK] Wrote {written} planners ({unchanged} unchanged, {kept} edited kept) "
+              f"in {time.perf_counter() - t0:.2f}s")
+        if kept:
+            print("     Use --force to overwrite planners that differ from the template.")
+        return
+
     if args.date:
         dt = datetime.strptime(args.date, '%Y-%m-%d').date()
     else:
         dt = datetime.today().date()
 
-    date_human = dt.strftime('%A, %d %B %Y')
-    content = TEMPLATE.format(date_human=date_human)
+    content = render(parts, dict(day_values(dt), user='', time_blocks=blocks))
 
-    outdir = args.out.expanduser().resolve()
     outdir.mkdir(parents=True, exist_ok=True)
     outpath = outdir / f"planner_{dt.isoformat()}.md"
     outpath.write_text(content, encoding='utf-8')
@@ -0,0 +1,66 @@
+"""Sessions must never be dropped, even when several start in the same second."""
+
+import csv
+import sqlite3
+
+import pytest
+
+import time_tracker as tt
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tt, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(tt, 'STATE_FILE', tmp_path / 'state.txt')
+    monkeypatch.setattr(tt, 'STATE_DB', tmp_path / 'state.db')
+    monkeypatch.setattr(tt, 'LOG_FILE', tmp_path / 'events.csv')
+    monkeypatch.setattr(tt, 'DB_FILE', tmp_path / 'events.db')
+    monkeypatch.setattr(tt, 'now_iso', lambda: '2026-03-02T09:00:00')  # every call in one second
+    return tmp_path
+
+
+def session_count():
+    conn = tt.open_db(tt.DB_FILE)
+    n = conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+    conn.close()
+    return n
+
+
+def test_same_second_sessions_are_all_kept(data_dir):
+    tt.open_db(tt.DB_FILE).close()
+    for _ in range(3):
+        tt.start_task(['write'])
+        tt.stop_task(['write'])
+    assert session_count() == 3
+
+
+def test_migrate_imports_every_row_once(data_dir):
+    for _ in range(3):
+        tt.start_task(['write'])
+        tt.stop_task(['write'])
+    with tt.LOG_FILE.open(encoding='utf-8') as f:
+        assert len(list(csv.DictReader(f))) == 3
+    tt.migrate()
+    assert session_count() == 3
+    tt.migrate()  # a re-run imports nothing twice
+    assert session_count() == 3
+
+
+def test_old_schema_is_upgraded(data_dir):
+    conn = sqlite3.connect(str(tt.DB_FILE))
+    conn.executescript("""
+        CREATE TABLE sessions (
+            id INTEGER PRIMARY KEY, date TEXT NOT NULL, task TEXT NOT NULL,
+            start TEXT NOT NULL, end TEXT NOT NULL, seconds INTEGER NOT NULL,
+            UNIQUE (start, task));
+        CREATE INDEX sessions_date ON sessions (date, task, seconds);
+        INSERT INTO sessions (date, task, start, end, seconds)
+            VALUES ('2026-03-02', 'write', '2026-03-02T08:00:00', '2026-03-02T08:30:00', 1800);
+    """)
+    conn.close()
+    tt.start_task(['write'])
+    tt.stop_task(['write'])
+    tt.start_task(['write'])
+    tt.stop_task(['write'])
+    assert session_count() == 3
+    assert tt.load_totals('2026-03-02', '2026-03-02')[0] == {'write': 1800}
@@ -9,89 +9,305 @@ experienced programmers who are newer to Python.
 """
 
 from pathlib import Path
+from contextlib import contextmanager
 import argparse
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import csv
+import sqlite3
 
 # --- Implementation notes ---------------------------------------------------
-# - Minimal state file to track a single running task.
+# - Any number of named timers can run at once (one per task name). They
+#   live in a `timers` table: in events.db when SQLite storage is on, else
+#   in state.db. start/stop run inside BEGIN IMMEDIATE transactions, so
+#   concurrent shells queue on SQLite's lock instead of racing a
+#   check-then-write, and WAL mode keeps those commits cheap.
+# - stop removes the timers and records their sessions in one transaction
+#   (a single CSV write made while holding the lock, or a single INSERT
+#   batch), and several --task values are handled as one batch.
+# - A state.txt left by older versions is imported as a running timer.
 # - Appends sessions to a CSV for simple analytics and portability.
-# - Report shows totals per task for a given day.
+# - Report shows totals per task for a given day, a --from/--to range or an
+#   ISO --week, plus per-day totals when the range spans several days.
+# - Optional SQLite store (events.db): `migrate` imports events.csv once and
+#   from then on sessions go to the database. Imported rows carry their CSV
+#   row number (csv_row), which is what makes re-running `migrate` safe;
+#   sessions themselves are never deduplicated by content, as two sessions
+#   of one task may start within the same second. It is indexed on
+#   (date, task, seconds), so a range report is an index range scan whose
+#   cost follows the rows in range rather than the whole history. Without
+#   events.db the CSV is scanned as before.
 # ----------------------------------------------------------------------------
 
 DATA_DIR = Path.home() / '.time_tracker'
 DATA_DIR.mkdir(exist_ok=True)
-STATE_FILE = DATA_DIR / 'state.txt'
+STATE_FILE = DATA_DIR / 'state.txt'  # pre-timers format, imported on first use
+STATE_DB = DATA_DIR / 'state.db'
 LOG_FILE = DATA_DIR / 'events.csv'
+DB_FILE = DATA_DIR / 'events.db'
 
 
 def now_iso():
     return datetime.now().isoformat(timespec='seconds')
 
 
-def start_task(task: str):
+@contextmanager
+def transaction(conn: sqlite3.Connection):
+    """BEGIN IMMEDIATE ... COMMIT: take the write lock up front, wait if busy."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def open_state() -> sqlite3.Connection:
+    """Connection holding the running timers (events.db if present, else state.db)."""
+    conn = open_db(DB_FILE) if DB_FILE.exists() else sqlite3.connect(str(STATE_DB), timeout=30)
+    conn.isolation_level = None  # transactions are explicit, see transaction()
+    conn.executescript("""
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        CREATE TABLE IF NOT EXISTS timers (task TEXT PRIMARY KEY, start TEXT NOT NULL);
+    """)
     if STATE_FILE.exists():
-        print('[ERR] A task is already running. Stop it first.')
-        return
-    STATE_FILE.write_text(task + '\n' + now_iso(), encoding='utf-8')
-    print(f"[OK] Started: {task}")
+        with transaction(conn):
+            lines = STATE_FILE.read_text(encoding='utf-8').splitlines()
+            if len(lines) >= 2:
+                conn.execute('INSERT OR IGNORE INTO timers VALUES (?, ?)', lines[:2])
+            STATE_FILE.unlink(missing_ok=True)
+    return conn
+
+
+def start_task(tasks):
+    conn = open_state()
+    start = now_iso()
+    started = []
+    with transaction(conn):
+        for task in tasks:
+            if conn.execute('INSERT OR IGNORE INTO timers VALUES (?, ?)', (task, start)).rowcount:
+                started.append(task)
+    conn.close()
+    for task in tasks:
+        if task in started:
+            print(f"[OK] Started: {task}")
+        else:
+            print(f"[ERR] Already running: {task}")
 
 
-def stop_task():
-    if not STATE_FILE.exists():
+def running_tasks():
+    conn = open_state()
+    rows = conn.execute('SELECT task, start FROM timers ORDER BY start').fetchall()
+    conn.close()
+    return rows
+
+
+def stop_task(tasks=None, stop_all: bool = False):
+    conn = open_state()
+    ambiguous = False
+    with transaction(conn):
+        running = dict(conn.execute('SELECT task, start FROM timers'))
+        if stop_all or (not tasks and len(running) == 1):
+            tasks = list(running)
+        elif not tasks:
+            ambiguous = len(running) > 1
+            tasks = []
+        stopped = [t for t in tasks if t in running]
+        end = now_iso()
+        rows = []
+        for task in stopped:
+            start = running[task]
+            duration = int((datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds())
+            rows.append([start[:10], task, start, end, duration])
+        conn.executemany('DELETE FROM timers WHERE task = ?', [(t,) for t in stopped])
+        append_sessions(conn, rows)
+    conn.close()
+
+    if ambiguous:
+        print(f"[ERR] Several tasks are running ({', '.join(sorted(running))}); use --task or --all.")
+    elif not running:
         print('[ERR] No running task.')
-        return
-    task, start = STATE_FILE.read_text(encoding='utf-8').splitlines()[:2]
-    STATE_FILE.unlink(missing_ok=True)
-    end = now_iso()
-    duration = (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds()
+    else:
+        for task in tasks:
+            if task not in running:
+                print(f"[ERR] Not running: {task}")
+    for row in rows:
+        print(f"[OK] Stopped: {row[1]} ({int(row[4]//60)} min)")
+
+
+def open_db(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=30)
+    if conn.execute('PRAGMA user_version').fetchone()[0] == 0:
+        _create_sessions(conn)
+    return conn
+
 
+def _create_sessions(conn: sqlite3.Connection):
+    """Create the sessions table, or rebuild one from before csv_row existed."""
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        if conn.execute('PRAGMA user_version').fetchone()[0] == 0:  # re-check under the lock
+            old = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sessions'").fetchone()
+            if old:
+                conn.execute('ALTER TABLE sessions RENAME TO sessions_old')
+                conn.execute('DROP INDEX IF EXISTS sessions_date')
+                conn.execute('DROP INDEX IF EXISTS sessions_task')
+            conn.execute("""
+                CREATE TABLE sessions (
+                    id INTEGER PRIMARY KEY, date TEXT NOT NULL, task TEXT NOT NULL,
+                    start TEXT NOT NULL, end TEXT NOT NULL, seconds INTEGER NOT NULL,
+                    csv_row INTEGER UNIQUE)""")
+            conn.execute('CREATE INDEX sessions_date ON sessions (date, task, seconds)')
+            conn.execute('CREATE INDEX sessions_task ON sessions (task, date)')
+            if old:
+                conn.execute('INSERT INTO sessions (date, task, start, end, seconds) '
+                             'SELECT date, task, start, end, seconds FROM sessions_old ORDER BY id')
+                conn.execute('DROP TABLE sessions_old')
+            conn.execute('PRAGMA user_version = 1')
+
+
+def append_sessions(conn: sqlite3.Connection, rows):
+    """Record finished sessions [date, task, start, end, seconds] inside conn's transaction.
+
+    With SQLite storage conn is events.db itself; for the CSV the open write
+    transaction on state.db is what keeps concurrent appends apart.
+    """
+    if not rows:
+        return
+    if DB_FILE.exists():
+        conn.executemany('INSERT INTO sessions (date, task, start, end, seconds) VALUES (?, ?, ?, ?, ?)', rows)
+        return
     new = not LOG_FILE.exists()
     with LOG_FILE.open('a', newline='', encoding='utf-8') as f:
         w = csv.writer(f)
         if new:
             w.writerow(['date', 'task', 'start', 'end', 'seconds'])
-        w.writerow([start[:10], task, start, end, int(duration)])
-    print(f"[OK] Stopped: {task} ({int(duration//60)} min)")
+        w.writerows(rows)
 
 
-def report(day: str | None):
-    if not LOG_FILE.exists():
-        print('No data yet.')
-        return
-    day = day or date.today().isoformat()
-    total = 0
+def migrate():
+    """Import events.csv into events.db (safe to re-run; rows already imported are skipped)."""
+    conn = open_db(DB_FILE)
+    before = conn.total_changes
+    if LOG_FILE.exists():
+        with LOG_FILE.open('r', encoding='utf-8') as f, conn:
+            # Each CSV row is keyed by its position, so a re-run skips exactly
+            # the rows imported before, even sessions that share a start second.
+            rows = ((r['date'], r['task'], r['start'], r['end'], int(r['seconds']), n)
+                    for n, r in enumerate(csv.DictReader(f), 1))
+            conn.executemany('INSERT INTO sessions (date, task, start, end, seconds, csv_row) '
+                             'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (csv_row) DO NOTHING', rows)
+    imported = conn.total_changes - before
+    conn.close()
+    if STATE_DB.exists():  # running timers move into events.db
+        old = sqlite3.connect(str(STATE_DB), timeout=30)
+        timers = old.execute('SELECT task, start FROM timers').fetchall()
+        old.close()
+        conn = open_state()
+        with transaction(conn):
+            conn.executemany('INSERT OR IGNORE INTO timers VALUES (?, ?)', timers)
+        conn.close()
+        for suffix in ('', '-wal', '-shm'):
+            Path(str(STATE_DB) + suffix).unlink(missing_ok=True)
+    print(f"[OK] Imported {imported} sessions into {DB_FILE}")
+    if LOG_FILE.exists():
+        print(f"     New sessions now go to the database; {LOG_FILE.name} is no longer updated.")
+
+
+def week_range(value: str):
+    """First and last day of the ISO week given as '2026-W08' or any date in it."""
+    if 'W' in value.upper():
+        year, week = value.upper().split('-W')
+        first = date.fromisocalendar(int(year), int(week), 1)
+    else:
+        d = date.fromisoformat(value)
+        first = d - timedelta(days=d.weekday())
+    return first.isoformat(), (first + timedelta(days=6)).isoformat()
+
+
+def load_totals(first: str, last: str):
+    """Return ({task: seconds}, {date: seconds}) for first <= date <= last (ISO dates)."""
     by_task = {}
+    by_day = {}
+    if DB_FILE.exists():
+        conn = open_db(DB_FILE)
+        rows = conn.execute(
+            'SELECT date, task, SUM(seconds) FROM sessions WHERE date BETWEEN ? AND ? GROUP BY date, task',
+            (first, last))
+        for day, task, s in rows:
+            by_task[task] = by_task.get(task, 0) + s
+            by_day[day] = by_day.get(day, 0) + s
+        conn.close()
+        return by_task, by_day
     with LOG_FILE.open('r', encoding='utf-8') as f:
         rdr = csv.DictReader(f)
         for row in rdr:
-            if row['date'] == day:
+            if first <= row['date'] <= last:
                 s = int(row['seconds'])
-                total += s
                 by_task[row['task']] = by_task.get(row['task'], 0) + s
-    print(f"Report for {day}:")
+                by_day[row['date']] = by_day.get(row['date'], 0) + s
+    return by_task, by_day
+
+
+def report(day: str | None, last: str | None = None):
+    if not LOG_FILE.exists() and not DB_FILE.exists():
+        print('No data yet.')
+        return
+    day = day or date.today().isoformat()
+    last = last or day
+    by_task, by_day = load_totals(day, last)
+    total = sum(by_task.values())
+    print(f"Report for {day}:" if day == last else f"Report for {day} .. {last}:")
     for t, s in sorted(by_task.items(), key=lambda x: x[1], reverse=True):
         print(f" - {t}: {int(s//60)} min")
+    if day != last:
+        print("By day:")
+        for d, s in sorted(by_day.items()):
+            print(f" - {d}: {int(s//60)} min")
     print(f"Total: {int(total//60)} min")
 
 
 def main():
-    ap = argparse.ArgumentParser(description='Simple CLI time tracker (CSV backend).')
+    ap = argparse.ArgumentParser(description='Simple CLI time tracker (CSV or SQLite backend).')
     sub = ap.add_subparsers(dest='cmd', required=True)
 
-    s = sub.add_parser('start', help='Start a task')
-    s.add_argument('--task', required=True)
+    s = sub.add_parser('start', help='Start a timer (several may run at once)')
+    s.add_argument('--task', required=True, action='append', help='Task name; repeat to start several')
 
-    e = sub.add_parser('stop', help='Stop running task')
+    e = sub.add_parser('stop', help='Stop running timers')
+    e.add_argument('--task', action='append', help='Task to stop; repeat for several (default: the only running one)')
+    e.add_argument('--all', action='store_true', help='Stop every running timer')
 
-    r = sub.add_parser('report', help='Show totals for a date (default today)')
+    sub.add_parser('status', help='List running timers')
+
+    r = sub.add_parser('report', help='Show totals for a date (default today), a range or a week')
     r.add_argument('--date', type=str)
+    r.add_argument('--from', dest='first', type=str, help='Range start (YYYY-MM-DD)')
+    r.add_argument('--to', dest='last', type=str, help='Range end, inclusive (default today)')
+    r.add_argument('--week', type=str, help='ISO week, e.g. 2026-W08, or any date inside it')
+
+    sub.add_parser('migrate', help='Move storage to SQLite (imports events.csv)')
 
     args = ap.parse_args()
+    if args.cmd == 'report' and args.last and not args.first:
+        ap.error('--to needs --from')
     if args.cmd == 'start':
         start_task(args.task)
     elif args.cmd == 'stop':
-        stop_task()
+        stop_task(args.task, args.all)
+    elif args.cmd == 'status':
+        rows = running_tasks()
+        for task, start in rows:
+            print(f" - {task} (since {start})")
+        if not rows:
+            print('No running task.')
+    elif args.cmd == 'migrate':
+        migrate()
+    elif args.week:
+        report(*week_range(args.week))
+    elif args.first:
+        report(args.first, args.last or date.today().isoformat())
     else:
         report(args.date)
 
@@ -8,47 +8,340 @@ This script is intentionally **well-commented** to be approachable for
 experienced programmers who are newer to Python.
 """
 
-import time
 import argparse
+import asyncio
+import json
+import math
+import socket
+import sys
 
 # --- Implementation notes ---------------------------------------------------
 # - Console-only countdowns; simple and portable.
 # - Defaults to the classic 25/5 with a 15-min long break every 4 cycles.
+# - Timing runs on asyncio with monotonic deadlines (loop.time()). Each
+#   phase ends at previous deadline + phase length, so wake-up latency
+#   never accumulates over a long session. A session is one task sleeping
+#   until its next deadline (or until paused/skipped), so idle sessions cost
+#   nothing between phase changes.
+# - Rendering is separate and skippable: the renderer redraws once per
+#   second for all sessions together (ticks follow the oldest session's
+#   clock), plus right away on a phase change or pause, and writes a frame
+#   only if it differs from the last one. `serve --no-display` turns it off.
+# - Lengths are checked (MAX_MINUTES, MAX_CYCLES) before a session starts;
+#   the API replies ok: false to bad or out-of-range values.
+# - `serve` runs many named sessions in one process (e.g. a team-room
+#   screen) and listens on 127.0.0.1:--port for JSON lines; `ctl` is the
+#   matching client: list/start/pause/resume/skip/stop.
 # ----------------------------------------------------------------------------
 
-def countdown(minutes: int, label: str):
-    seconds = minutes * 60
-    while seconds >= 0:
-        mm, ss = divmod(seconds, 60)
-        print(f"\r{label}: {mm:02d}:{ss:02d}", end='')
-        time.sleep(1)
-        seconds -= 1
-    print()  # newline after phase ends
+DEFAULT_PORT = 8765
+MAX_MINUTES = 24 * 60  # longest phase accepted
+MAX_CYCLES = 1000
 
 
-def run_pomodoro(work: int, short: int, long: int, cycles: int):
+def pomodoro_phases(work: int, short: int, long: int, cycles: int):
+    """List of (cycle, label, heading, seconds) for a full run."""
+    phases = []
     for i in range(1, cycles + 1):
-        print(f"\n[Cycle {i}/{cycles}] Focus")
-        countdown(work, 'Work')
+        phases.append((i, 'Work', f"[Cycle {i}/{cycles}] Focus", work * 60))
         if i % 4 == 0:
-            print("Long break")
-            countdown(long, 'Break')
+            phases.append((i, 'Break', "Long break", long * 60))
         else:
-            print("Short break")
-            countdown(short, 'Break')
+            phases.append((i, 'Break', "Short break", short * 60))
+    return phases
+
+
+def check_lengths(work: int, short: int, long: int, cycles: int):
+    """Raise ValueError unless the minutes and cycle count are in range."""
+    if not 1 <= work <= MAX_MINUTES:
+        raise ValueError(f"work must be 1..{MAX_MINUTES} minutes")
+    if not (0 <= short <= MAX_MINUTES and 0 <= long <= MAX_MINUTES):
+        raise ValueError(f"breaks must be 0..{MAX_MINUTES} minutes")
+    if not 1 <= cycles <= MAX_CYCLES:
+        raise ValueError(f"cycles must be 1..{MAX_CYCLES}")
+
+
+class Session:
+    """One named pomodoro run; its timing is driven by Scheduler._run()."""
+
+    def __init__(self, name: str, work: int, short: int, long: int, cycles: int):
+        self.name = name
+        self.phases = pomodoro_phases(work, short, long, cycles)
+        self.index = 0
+        self.deadline = None     # loop.time() at which the current phase ends
+        self.paused_left = None  # seconds left while paused
+        self.done = False
+        self.changed = asyncio.Event()
+
+    def remaining(self, now: float) -> float:
+        if self.paused_left is not None:
+            return self.paused_left
+        if self.deadline is None:  # finished, or its task has not run yet
+            return 0.0 if self.done else float(self.phases[self.index][3])
+        return max(0.0, self.deadline - now)
+
+    def status(self, now: float) -> dict:
+        cycle, label, _, _ = self.phases[self.index]
+        return {'name': self.name, 'cycle': cycle, 'cycles': self.phases[-1][0], 'phase': label,
+                'remaining': math.ceil(self.remaining(now)), 'paused': self.paused_left is not None,
+                'done': self.done}
+
+
+class Scheduler:
+    """Runs any number of sessions on one event loop."""
+
+    def __init__(self, on_phase=None):
+        self.sessions = {}
+        self.tasks = {}
+        self.on_phase = on_phase    # called with the session at every phase change
+        self.dirty = asyncio.Event()  # wakes the renderer early
+
+    def _now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def start(self, name: str, work: int = 25, short: int = 5, long: int = 15, cycles: int = 4) -> Session:
+        check_lengths(work, short, long, cycles)
+        if name in self.sessions and not self.sessions[name].done:
+            raise ValueError(f"session {name!r} is already running")
+        s = Session(name, work, short, long, cycles)
+        self.sessions[name] = s
+        self.tasks[name] = asyncio.create_task(self._run(s))
+        return s
+
+    async def _run(self, s: Session):
+        for s.index, (_, _, _, seconds) in enumerate(s.phases):
+            start = s.deadline if s.deadline is not None else self._now()
+            s.deadline = start + seconds
+            self._phase_changed(s)
+            while True:
+                if s.paused_left is not None:
+                    timeout = None
+                else:
+                    timeout = s.deadline - self._now()
+                    if timeout <= 0:
+                        break
+                s.changed.clear()
+                try:
+                    await asyncio.wait_for(s.changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        s.done = True
+        s.deadline = None
+        self._phase_changed(s)
+
+    def _phase_changed(self, s: Session):
+        if self.on_phase:
+            self.on_phase(s)
+        self.dirty.set()
+
+    def _get(self, name: str) -> Session:
+        if name not in self.sessions:
+            raise KeyError(f"no session named {name!r}")
+        return self.sessions[name]
+
+    def pause(self, name: str):
+        s = self._get(name)
+        if s.paused_left is None and not s.done:
+            s.paused_left = s.remaining(self._now())
+            s.deadline = None
+            s.changed.set()
+            self.dirty.set()
+
+    def resume(self, name: str):
+        s = self._get(name)
+        if s.paused_left is not None:
+            s.deadline = self._now() + s.paused_left
+            s.paused_left = None
+            s.changed.set()
+            self.dirty.set()
+
+    def skip(self, name: str):
+        """End the current phase now."""
+        s = self._get(name)
+        s.paused_left = None
+        s.deadline = self._now()
+        s.changed.set()
+
+    def stop(self, name: str):
+        self._get(name)
+        self.tasks.pop(name).cancel()
+        del self.sessions[name]
+        self.dirty.set()
+
+    def command(self, req: dict):
+        """Handle one API request; raise ValueError/KeyError for bad ones."""
+        if not isinstance(req, dict):
+            raise ValueError("request must be a JSON object")
+        cmd = req.get('cmd')
+        now = self._now()
+        if cmd == 'list':
+            return [s.status(now) for s in self.sessions.values()]
+        if cmd == 'start':
+            s = self.start(req['name'], int(req.get('work', 25)), int(req.get('short', 5)),
+                           int(req.get('long', 15)), int(req.get('cycles', 4)))
+            return s.status(now)
+        if cmd in ('pause', 'resume', 'skip', 'stop'):
+            getattr(self, cmd)(req['name'])
+            return None
+        raise ValueError(f"unknown command {cmd!r}")
+
+    def next_redraw(self, now: float) -> float:
+        """Seconds until the next shared redraw tick (one per second for all sessions).
+
+        Ticks follow the oldest running session, so its clock (the only one
+        in single-session mode) changes exactly on time; the others are
+        shown at most a second late instead of each forcing its own redraw.
+        """
+        for s in self.sessions.values():
+            if s.deadline is not None:
+                return max((s.deadline - now) % 1.0, 0.01)
+        return 1.0
+
+
+def format_clock(seconds: int) -> str:
+    mm, ss = divmod(seconds, 60)
+    return f"{mm:02d}:{ss:02d}"
+
+
+def board_frame(sched: Scheduler, now: float) -> str:
+    """Full-screen table of all sessions (serve mode)."""
+    lines = [f"{'Session':<20} {'Cycle':>7}  {'Phase':<6} {'Left':>6}"]
+    for s in sched.sessions.values():
+        st = s.status(now)
+        state = 'done' if st['done'] else format_clock(st['remaining']) + (' (paused)' if st['paused'] else '')
+        lines.append(f"{st['name']:<20} {st['cycle']:>3}/{st['cycles']:<3}  {st['phase']:<6} {state:>6}")
+    return '\x1b[H\x1b[2J' + '\n'.join(lines) + '\n'
+
+
+async def render_loop(sched: Scheduler, frame_fn):
+    loop = asyncio.get_running_loop()
+    last = None
+    while True:
+        now = loop.time()
+        frame = frame_fn(sched, now)
+        if frame != last:  # skip the write when nothing visible changed
+            sys.stdout.write(frame)
+            sys.stdout.flush()
+            last = frame
+        sched.dirty.clear()
+        try:
+            await asyncio.wait_for(sched.dirty.wait(), sched.next_redraw(now))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _run_single(work: int, short: int, long: int, cycles: int):
+    def on_phase(s: Session):
+        if s.index or s.done:
+            print()  # newline after a phase ends
+        if not s.done:
+            print(f"\n{s.phases[s.index][2]}" if s.phases[s.index][1] == 'Work' else s.phases[s.index][2])
+
+    def line(sched: Scheduler, now: float) -> str:
+        s = sched.sessions['pomodoro']
+        if s.done:
+            return ''
+        return f"\r{s.phases[s.index][1]}: {format_clock(math.ceil(s.remaining(now)))}"
+
+    sched = Scheduler(on_phase)
+    sched.start('pomodoro', work, short, long, cycles)
+    renderer = asyncio.create_task(render_loop(sched, line))
+    await sched.tasks['pomodoro']
+    renderer.cancel()
+
+
+def run_pomodoro(work: int, short: int, long: int, cycles: int):
+    asyncio.run(_run_single(work, short, long, cycles))
     print("\nDone. Great job!")
 
 
+async def _serve(port: int, display: bool):
+    sched = Scheduler()
+
+    async def handle(reader, writer):
+        async for line in reader:
+            try:
+                resp = {'ok': True, 'result': sched.command(json.loads(line))}
+            except (ValueError, KeyError, TypeError, OverflowError) as e:  # e.g. {"work": 1e999}
+                resp = {'ok': False, 'error': str(e).strip('"')}
+            writer.write((json.dumps(resp) + '\n').encode('utf-8'))
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', port)
+    print(f"[OK] Listening on 127.0.0.1:{port}")
+    if display:
+        asyncio.create_task(render_loop(sched, board_frame))
+    async with server:
+        await server.serve_forever()
+
+
+def serve_main(argv):
+    ap = argparse.ArgumentParser(prog='pomodoro.py serve', description='Run many named pomodoro sessions.')
+    ap.add_argument('--port', type=int, default=DEFAULT_PORT, help='Local TCP port for the control API')
+    ap.add_argument('--no-display', action='store_true', help='Do not draw the session board')
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(_serve(args.port, not args.no_display))
+    except KeyboardInterrupt:
+        print()
+
+
+def ctl_main(argv):
+    ap = argparse.ArgumentParser(prog='pomodoro.py ctl', description='Query or control a running `serve`.')
+    ap.add_argument('cmd', choices=['list', 'start', 'pause', 'resume', 'skip', 'stop'])
+    ap.add_argument('--name', help='Session name (all commands except list)')
+    ap.add_argument('--work', type=int, default=25, help='Work minutes (start)')
+    ap.add_argument('--short', type=int, default=5, help='Short break minutes (start)')
+    ap.add_argument('--long', type=int, default=15, help='Long break minutes (start)')
+    ap.add_argument('--cycles', type=int, default=4, help='Number of focus cycles (start)')
+    ap.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = ap.parse_args(argv)
+    if args.cmd != 'list' and not args.name:
+        ap.error('--name is required')
+
+    req = {'cmd': args.cmd, 'name': args.name}
+    if args.cmd == 'start':
+        req.update(work=args.work, short=args.short, long=args.long, cycles=args.cycles)
+    try:
+        with socket.create_connection(('127.0.0.1', args.port), timeout=5) as sock:
+            sock.sendall((json.dumps(req) + '\n').encode('utf-8'))
+            resp = json.loads(sock.makefile('r', encoding='utf-8').readline())
+    except OSError as e:
+        print(f"[ERR] Cannot reach pomodoro server on port {args.port}: {e}")
+        sys.exit(1)
+    if not resp['ok']:
+        print(f"[ERR] {resp['error']}")
+        sys.exit(1)
+    if args.cmd == 'list':
+        for st in resp['result']:
+            state = 'done' if st['done'] else format_clock(st['remaining']) + (' (paused)' if st['paused'] else '')
+            print(f" - {st['name']}: cycle {st['cycle']}/{st['cycles']} {st['phase']} {state}")
+        if not resp['result']:
+            print('No sessions.')
+    else:
+        print(f"[OK] {args.cmd} {args.name}")
+
 
 def main():
-    ap = argparse.ArgumentParser(description='Console Pomodoro timer.')
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'ctl':
+        ctl_main(sys.argv[2:])
+        return
+    ap = argparse.ArgumentParser(description='Console Pomodoro timer.',
+                                 epilog='Multi-session mode: "serve" and "ctl" (see --help of each).')
     ap.add_argument('--work', type=int, default=25, help='Work minutes')
     ap.add_argument('--short', type=int, default=5, help='Short break minutes')
     ap.add_argument('--long', type=int, default=15, help='Long break minutes')
     ap.add_argument('--cycles', type=int, default=4, help='Number of focus cycles')
     args = ap.parse_args()
+    try:
+        check_lengths(args.work, args.short, args.long, args.cycles)
+    except ValueError as e:
+        ap.error(str(e))
     run_pomodoro(args.work, args.short, args.long, args.cycles)
 
 if __name__ == '__main__':
     main()
-
@@ -10,28 +10,344 @@ experienced programmers who are newer to Python.
 
 from pathlib import Path
 import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 
 # --- Implementation notes ---------------------------------------------------
-# - Uses Pillow's thumbnail() to preserve aspect ratio within a max box.
+# - Preserves aspect ratio within a max box (same sizing as thumbnail()).
+# - Fast path (default, --no-draft to disable): JPEGs are decoded directly
+#   at the smallest DCT scale (1/2, 1/4, 1/8) that is still at least the
+#   output size via Image.draft(), other formats are shrunk by an integer
+#   factor with reduce() (resize's reducing_gap); a final LANCZOS resample
+#   produces the exact size. --no-draft decodes at full resolution and
+#   resamples once, for reference-quality output.
 # - Applies JPEG quality settings and optimize flag for JPG/JPEG.
+# - Each image is opened in a `with` block so its file handle is closed as
+#   soon as it is saved, and written to a temp file that is then renamed
+#   over the target, so readers never see a half-written image.
+# - --workers N resizes on a process pool. At most N * QUEUE_PER_WORKER
+#   images are queued at once, which bounds open handles and memory.
+# - --sizes 320x240,800x600,... writes several renditions into per-size
+#   subfolders (e.g. out/800x600/) from a single decode: the largest is made
+#   from the source (with the fast path above), each smaller one from the
+#   next-larger rendition. "Largest" is the size fit_within() gives for this
+#   image, so a wide 4000x100 box ranks below 600x600 for a square photo,
+#   and the JPEG draft is sized for that largest output before decoding.
+#   JPEG/WEBP get --quality, JPEG also optimize.
+# - A manifest (out/.resize_manifest.json or --manifest) records, per source,
+#   its size, mtime_ns, SHA-256 and the resize parameters. Sources whose size
+#   and mtime match are skipped without being read; if only the mtime moved,
+#   the hash decides. --prune deletes outputs of sources that disappeared.
+# - --recursive walks subfolders (mirrored under every output folder).
+#   Sources are streamed from a generator, never listed up front. Output
+#   folders inside --src (including the rendition folders when --out is
+#   --src itself) are never read back as sources.
+# - --max-pixels caps the decoded pixels (width * height, read from the file
+#   header) in flight across workers. An image above the cap on its own is
+#   deferred to the end and processed while nothing else is running.
+# - Prints per-image timing and overall throughput (images/sec).
 # ----------------------------------------------------------------------------
 
 SUPPORTED = {'.jpg', '.jpeg', '.png', '.webp'}
+QUEUE_PER_WORKER = 2  # images queued per worker with --workers
+REDUCING_GAP = 2.0  # fast path: integer reduce() while >= 2x the final size
+MANIFEST_NAME = '.resize_manifest.json'
+MANIFEST_SAVE_EVERY = 500  # images between manifest checkpoints
 
 
-def process(src: Path, out: Path, max_w: int, max_h: int, quality: int):
-    out.mkdir(parents=True, exist_ok=True)
-    for p in src.iterdir():
-        if p.is_file() and p.suffix.lower() in SUPPORTED:
-            im = Image.open(p)
-            im.thumbnail((max_w, max_h))  # in-place resize preserving aspect ratio
-            target = out / p.name
-            save_args = {}
-            if target.suffix.lower() in {'.jpg', '.jpeg'}:
-                save_args.update({'optimize': True, 'quality': quality})
-            im.save(target, **save_args)
-            print(f"[OK] {p.name} -> {target} ({im.width}x{im.height})")
+def save_atomic(im: Image.Image, target: Path, **save_args):
+    """Save `im` to a temp file next to `target`, then rename it into place."""
+    tmp = target.with_name(f".{target.stem}.tmp{target.suffix}")
+    try:
+        im.save(tmp, **save_args)
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def fit_within(size, box):
+    """Return the largest size with `size`'s aspect ratio inside `box`, or None if it already fits.
+
+    Rounds exactly like Image.thumbnail(), so outputs keep the same dimensions.
+    """
+    w, h = size
+    x, y = box
+    if x >= w and y >= h:
+        return None
+    aspect = w / h
+
+    def round_aspect(number, key):
+        return max(min(math.floor(number), math.ceil(number), key=key), 1)
+
+    if x / y >= aspect:
+        x = round_aspect(y * aspect, key=lambda n: abs(aspect - n / y))
+    else:
+        y = round_aspect(x / aspect, key=lambda n: 0 if n == 0 else abs(aspect - x / n))
+    return x, y
+
+
+def draft_for(im: Image.Image, size):
+    """Let a JPEG decode at the smallest DCT scale still at least `size`.
+
+    Must be called before the image is loaded. Returns the crop box to pass
+    to resize() on the drafted image (None for other formats).
+    """
+    res = im.draft(None, size)  # JPEG only; None for other formats
+    return res[1] if res else None
+
+
+def shrink(im: Image.Image, final, fast: bool = True, crop=None) -> Image.Image:
+    """Return `im` resampled to `final` (or `im` itself if nothing is to be done)."""
+    if crop is None and final == im.size:
+        return im
+    return im.resize(final, Image.Resampling.LANCZOS, box=crop,
+                     reducing_gap=REDUCING_GAP if fast else None)
+
+
+def save_options(target: Path, quality: int) -> dict:
+    """Pillow save() keyword arguments for the target's format."""
+    suffix = target.suffix.lower()
+    if suffix in {'.jpg', '.jpeg'}:
+        return {'optimize': True, 'quality': quality}
+    if suffix == '.webp':
+        return {'quality': quality}
+    return {}
+
+
+def file_digest(p: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with p.open('rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def resize_one(p: Path, renditions, quality: int, fast: bool = True, digest: bool = False):
+    """Decode `p` once and write every (box, target) in `renditions`.
+
+    Renditions are made largest output first (by the size each box gives this
+    image, not by box area); each is resampled from the previous one when that
+    still has enough pixels. The JPEG draft is sized for the largest output.
+    Returns ([(width, height), ...] in `renditions` order, seconds,
+    sha256 of `p` if `digest` else None).
+    """
+    t0 = time.perf_counter()
+    sha = file_digest(p) if digest else None
+    sizes = [None] * len(renditions)
+    with Image.open(p) as im:
+        finals = [fit_within(im.size, box) or im.size for box, _ in renditions]
+        order = sorted(range(len(renditions)), key=lambda i: finals[i][0] * finals[i][1], reverse=True)
+        crop = None
+        if fast and finals[order[0]] != im.size:
+            crop = draft_for(im, finals[order[0]])
+        current = im
+        for i in order:
+            final, target = finals[i], renditions[i][1]
+            if current is not im and current.width >= final[0] and current.height >= final[1]:
+                small = shrink(current, final, fast)
+            else:
+                small = shrink(im, final, fast, crop)
+            save_atomic(small, target, **save_options(target, quality))
+            sizes[i] = small.size
+            if current is not im and current is not small:
+                current.close()
+            current = small
+        if current is not im:
+            current.close()
+    return sizes, time.perf_counter() - t0, sha
+
+
+def pixel_cost(p: Path) -> int:
+    """Full-resolution pixel count from the image header (no decode)."""
+    try:
+        with Image.open(p) as im:
+            return im.width * im.height
+    except Exception:
+        return 0  # let the worker report the real error
+
+
+def _run_jobs(jobs, workers: int, max_pixels: int = None):
+    """Run resize_one(*args) for each job; yield (args, result, error).
+
+    Results come back in job order, except that images over `max_pixels`
+    are run last, one at a time.
+    """
+    if workers <= 1:
+        for args in jobs:
+            try:
+                yield args, resize_one(*args), None
+            except Exception as e:
+                yield args, None, e
+        return
+
+    def collect(args, future):
+        try:
+            return args, future.result(), None
+        except Exception as e:
+            return args, None, e
+
+    pending = deque()  # (args, future, pixels)
+    in_flight = 0
+    deferred = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for args in jobs:
+            cost = pixel_cost(args[0]) if max_pixels else 0
+            if max_pixels and cost > max_pixels:
+                deferred.append(args)
+                continue
+            while pending and (len(pending) >= workers * QUEUE_PER_WORKER
+                               or (max_pixels and in_flight + cost > max_pixels)):
+                done_args, future, done_cost = pending.popleft()
+                in_flight -= done_cost
+                yield collect(done_args, future)
+            pending.append((args, pool.submit(resize_one, *args), cost))
+            in_flight += cost
+        while pending:
+            done_args, future, _ = pending.popleft()
+            yield collect(done_args, future)
+        for args in deferred:
+            yield collect(args, pool.submit(resize_one, *args))
+
+
+def iter_sources(src: Path, out_dirs, recursive: bool = False):
+    """Yield supported image files in `src` (and below, if recursive).
+
+    A recursive walk skips every directory in `out_dirs` that sits below
+    `src` (e.g. the rendition folders when --out is --src itself).
+    """
+    skip = [d for d in out_dirs if d != src and src in d.parents] if recursive else []
+    for p in (src.rglob('*') if recursive else src.iterdir()):
+        if p.suffix.lower() in SUPPORTED and p.is_file() and not any(p.is_relative_to(d) for d in skip):
+            yield p
+
+
+class Manifest:
+    """JSON record of processed sources: {relative path: entry}.
+
+    entry = {"size", "mtime_ns", "sha256", "params", "outputs"}; outputs are
+    paths relative to the output folder.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries = {}
+        if path.exists():
+            self.entries = json.loads(path.read_text(encoding='utf-8'))
+
+    def is_current(self, key: str, src: Path, st, params: str, out: Path) -> bool:
+        """True if source `src` (stored as `key`) was processed with `params` from identical content."""
+        e = self.entries.get(key)
+        if not e or e['params'] != params or not all((out / o).exists() for o in e['outputs']):
+            return False
+        if (e['size'], e['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+            return True
+        if e['size'] == st.st_size and e['sha256'] == file_digest(src):
+            e['mtime_ns'] = st.st_mtime_ns  # touched, not changed
+            return True
+        return False
+
+    def record(self, key: str, st, sha: str, params: str, outputs):
+        self.entries[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha,
+                             'params': params, 'outputs': list(outputs)}
+
+    def prune(self, existing, out: Path) -> int:
+        """Delete outputs and entries of sources not in `existing`; return count."""
+        gone = [k for k in self.entries if k not in existing]
+        for k in gone:
+            for o in self.entries.pop(k)['outputs']:
+                (out / o).unlink(missing_ok=True)
+        return len(gone)
+
+    def save(self):
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps(self.entries), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+
+def parse_sizes(spec: str):
+    """Parse "320x240,800x600" into [(320, 240), (800, 600)]."""
+    sizes = []
+    for part in spec.split(','):
+        w, _, h = part.strip().lower().partition('x')
+        sizes.append((int(w), int(h)))
+    return sizes
+
+
+def process(src: Path, out: Path, max_w: int, max_h: int, quality: int, workers: int = 1,
+            fast: bool = True, sizes=None, manifest_path: Path = None, prune: bool = False,
+            recursive: bool = False, max_pixels: int = None):
+    """Resize every supported image in `src`.
+
+    Without `sizes` each image goes to out/<name> within max_w x max_h; with
+    `sizes` ([(w, h), ...]) to out/<w>x<h>/<name> for every size. With
+    `recursive`, <name> is the path relative to `src`. Images the manifest
+    shows as already done with the same parameters are skipped.
+    """
+    if sizes:
+        boxes = sorted(sizes, key=lambda b: b[0] * b[1], reverse=True)
+        dirs = [out / f"{w}x{h}" for w, h in boxes]
+    else:
+        boxes, dirs = [(max_w, max_h)], [out]
+    for d in dirs:
+        d.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(manifest_path or out / MANIFEST_NAME)
+    params = json.dumps({'boxes': boxes, 'quality': quality, 'fast': fast})
+    seen = set()
+    stats = {}  # relative key -> stat of sources sent for processing
+    made_dirs = set(dirs)
+    skipped = 0
+
+    def jobs():
+        nonlocal skipped
+        for p in iter_sources(src, [out, *dirs], recursive):
+            rel = p.relative_to(src)
+            key = rel.as_posix()
+            seen.add(key)
+            st = p.stat()
+            if manifest.is_current(key, p, st, params, out):
+                skipped += 1
+                continue
+            stats[key] = st
+            targets = [d / rel for d in dirs]
+            for t in targets:
+                if t.parent not in made_dirs:
+                    t.parent.mkdir(parents=True, exist_ok=True)
+                    made_dirs.add(t.parent)
+            yield p, list(zip(boxes, targets)), quality, fast, True
+
+    t0 = time.perf_counter()
+    done = 0
+    for (p, renditions, *_), result, err in _run_jobs(jobs(), workers, max_pixels):
+        key = p.relative_to(src).as_posix()
+        st = stats.pop(key)
+        if err is not None:
+            print(f"[ERR] {p.name}: {err}")
+            continue
+        out_sizes, secs, sha = result
+        manifest.record(key, st, sha, params, [t.relative_to(out).as_posix() for _, t in renditions])
+        done += 1
+        if done % MANIFEST_SAVE_EVERY == 0:
+            manifest.save()
+        if len(renditions) == 1:
+            (w, h), = out_sizes
+            print(f"[OK] {p.name} -> {renditions[0][1]} ({w}x{h}) in {secs:.3f}s")
+        else:
+            made = ', '.join(f"{w}x{h}" for w, h in out_sizes)
+            print(f"[OK] {p.name} -> {made} in {secs:.3f}s")
+    if prune:
+        removed = manifest.prune(seen, out)
+        print(f"Pruned outputs of {removed} deleted sources")
+    manifest.save()
+    elapsed = time.perf_counter() - t0
+    rate = done / elapsed if elapsed else 0.0
+    print(f"Processed {done} images in {elapsed:.2f}s ({rate:.1f} images/sec), {skipped} unchanged")
 
 
 def main():
@@ -41,12 +357,25 @@ def main():
     ap.add_argument('--max-width', type=int, default=1600)
     ap.add_argument('--max-height', type=int, default=1200)
     ap.add_argument('--quality', type=int, default=85, help='JPEG quality (1-95)')
+    ap.add_argument('--workers', type=int, default=1, help='Worker processes (default: 1)')
+    ap.add_argument('--no-draft', action='store_true',
+                    help='Decode at full resolution instead of the reduced-size fast path')
+    ap.add_argument('--sizes', type=parse_sizes,
+                    help='Several renditions from one decode, e.g. "320x240,800x600,1600x1200" '
+                         '(overrides --max-width/--max-height)')
+    ap.add_argument('--manifest', type=Path, help=f'Manifest path (default: <out>/{MANIFEST_NAME})')
+    ap.add_argument('--prune', action='store_true', help='Delete outputs whose source image was removed')
+    ap.add_argument('--recursive', action='store_true', help='Include subfolders, keeping their structure')
+    ap.add_argument('--max-pixels', type=int,
+                    help='With --workers, max decoded pixels in flight (e.g. 200000000 for ~600 MB RGB)')
     args = ap.parse_args()
 
-    process(args.src.expanduser().resolve(), args.out.expanduser().resolve(), args.max_width, args.max_height, args.quality)
+    process(args.src.expanduser().resolve(), args.out.expanduser().resolve(), args.max_width, args.max_height,
+            args.quality, args.workers, not args.no_draft, args.sizes,
+            args.manifest.expanduser().resolve() if args.manifest else None, args.prune,
+            args.recursive, args.max_pixels)
 
 
 
 if __name__ == '__main__':
     main()
-
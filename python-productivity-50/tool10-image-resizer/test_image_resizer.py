@@ -0,0 +1,75 @@
+"""The draft fast path must match --no-draft output closely, at the same sizes."""
+
+from PIL import Image, ImageChops, ImageStat
+
+import pytest
+
+import image_resizer as ir
+
+# Mean absolute difference per channel (0-255) allowed between draft and
+# full-resolution output. DCT-scaled decoding blurs slightly differently
+# from a full decode + LANCZOS; on photo-like detail that stays well below
+# this bound, while a wrong size or a misplaced crop box lands far above it.
+MAX_MEAN_DIFF = 2.0
+
+
+def make_jpeg(path, size):
+    """Photo-like test image: Mandelbrot detail in one channel, gradients in the others."""
+    detail = Image.effect_mandelbrot(size, (-2.0, -1.2, 1.0, 1.2), 100)
+    ramp = Image.linear_gradient('L').resize(size)
+    glow = Image.radial_gradient('L').resize(size)
+    Image.merge('RGB', (detail, ramp, glow)).save(path, quality=92)
+    return path
+
+
+def render(tmp_path, src, boxes, fast):
+    out = tmp_path / ('draft' if fast else 'full')
+    out.mkdir(exist_ok=True)
+    renditions = [(box, out / f"{box[0]}x{box[1]}.png") for box in boxes]
+    sizes, _, _ = ir.resize_one(src, renditions, 90, fast)
+    return sizes, [target for _, target in renditions]
+
+
+@pytest.mark.parametrize('boxes', [[(800, 600)], [(800, 600), (320, 240), (100, 100)]])
+def test_draft_matches_full_decode(tmp_path, boxes):
+    src = make_jpeg(tmp_path / 'photo.jpg', (3200, 2400))
+    draft_sizes, draft_files = render(tmp_path, src, boxes, True)
+    full_sizes, full_files = render(tmp_path, src, boxes, False)
+    assert draft_sizes == full_sizes
+    for a, b in zip(draft_files, full_files):
+        with Image.open(a) as da, Image.open(b) as fb:
+            assert da.size == fb.size
+            diff = ImageStat.Stat(ImageChops.difference(da.convert('RGB'), fb.convert('RGB'))).mean
+            assert max(diff) <= MAX_MEAN_DIFF, (a.name, diff)
+
+
+@pytest.mark.parametrize('fast', [True, False])
+@pytest.mark.parametrize('source, expected', [
+    ((4000, 4000), [(100, 100), (600, 600)]),
+    ((4000, 3000), [(133, 100), (600, 450)]),
+])
+def test_rendition_sizes_follow_output_not_box_area(tmp_path, fast, source, expected):
+    # 4000x100 has the larger box area, but 600x600 is the larger output.
+    src = tmp_path / 'big.jpg'
+    Image.new('RGB', source, (90, 120, 150)).save(src, quality=90)
+    sizes, _ = render(tmp_path, src, [(4000, 100), (600, 600)], fast)
+    assert sizes == expected
+
+
+def test_recursive_sizes_into_src_does_not_reread_outputs(tmp_path):
+    # --out == --src with --recursive --sizes: the rendition folders are
+    # written inside the walked tree and must not be picked up as sources.
+    (tmp_path / 'sub').mkdir()
+    for name in ('a.jpg', 'sub/b.jpg'):
+        Image.new('RGB', (400, 300), (10, 20, 30)).save(tmp_path / name)
+    (tmp_path / '200x150').mkdir()
+    Image.new('RGB', (200, 150)).save(tmp_path / '200x150' / 'a.jpg')  # from an earlier run
+    found = ir.iter_sources(tmp_path, [tmp_path, tmp_path / '200x150', tmp_path / '100x75'], True)
+    assert sorted(p.relative_to(tmp_path).as_posix() for p in found) == ['a.jpg', 'sub/b.jpg']
+    ir.process(tmp_path, tmp_path, 0, 0, 85, sizes=[(200, 150), (100, 75)], recursive=True)
+    made = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob('*.jpg'))
+    assert made == ['100x75/a.jpg', '100x75/sub/b.jpg', '200x150/a.jpg', '200x150/sub/b.jpg',
+                    'a.jpg', 'sub/b.jpg']
+    # A second run finds everything current and writes nothing new.
+    ir.process(tmp_path, tmp_path, 0, 0, 85, sizes=[(200, 150), (100, 75)], recursive=True)
+    assert len(list(tmp_path.rglob('*.jpg'))) == len(made)